@@ -1,36 +1,142 @@
 import pandas as pd
 import numpy as np
 import re
+import time
+import os
+import json
+import hashlib
+import math
+import sys
+import tracemalloc
+from collections import defaultdict
 
-# 0. 엑셀 파일 로드
-df_raw = pd.read_excel("/content/모범음식점_리스트_지오코딩_4326.xlsx")
+try:
+    import psutil  # 단계별 프로세스 메모리(RSS) 확인용
+except ImportError:
+    psutil = None
+try:
+    import resource  # psutil이 없을 때 프로세스 최대 RSS로 대체 (Linux/macOS)
+except ImportError:
+    resource = None
+try:
+    import pyarrow as pa  # Arrow 문자열 버퍼는 tracemalloc에 잡히지 않으므로 메모리 풀에서 직접 확인
+except ImportError:
+    pa = None
 
-# 1. 필요한 컬럼만 선택
+SOURCE_XLSX = "/content/모범음식점_리스트_지오코딩_4326.xlsx"
+SOURCE_CACHE = os.path.splitext(SOURCE_XLSX)[0] + ".parquet"  # None이면 캐시 미사용
+NEAR_DUP_GRID_DEG = 0.001  # 근접 중복 블로킹 격자 크기(도, 약 100m)
+NEAR_DUP_NAME_SIM = 0.8    # 업소명 bigram 유사도 기준 (본점/본관/직영점 표기는 제거 후 비교)
+NEAR_DUP_MAX_DIST_M = 50   # 좌표 간 거리 기준(m)
+NEAR_DUP_ADDR_SIM = 0.8    # 좌표가 없을 때 주소 bigram 유사도 기준
+NEAR_DUP_MAX_PAIRS = 90000  # 블록 비교 쌍이 이보다 많으면 업소명 첫 글자로 다시 분할
+NEAR_DUP_DROP = False      # True면 근접 중복 클러스터에서 첫 행만 남김 (기본은 보고서만 저장, 검토 후 켜기)
+NEAR_DUP_REPORT = "restaurant_dedup_report.csv"
+COMPACT = True  # True면 범주형/Arrow 문자열로 메모리 절약
+MEMORY_TRACE = False  # True면 단계별 Python 힙 최대치(tracemalloc)도 측정 (측정 중에는 처리 속도가 느려짐)
+RUN_BENCHMARK = False  # True면 전화번호/주소 처리 동일성 검증 + 속도 비교만 실행 후 종료
+
+# 필요한 컬럼
 need_cols = ["restaurant_name","address","category","menu","phone_number","lon","lat","ctp_kor_nm","sig_kor_nm","emd_kor_nm"]
-df = df_raw[need_cols].copy()
+num_cols = ["lon","lat"]
+cat_cols = ["ctp_kor_nm","sig_kor_nm","emd_kor_nm","category","menu"]  # 값 종류가 적은 컬럼
 
-# 2. 업소명+주소(도로명주소+소재지주소) 기준 중복 제거
-def norm_key(x):
-    t = str(x).strip().lower()
-    t = re.sub(r"\s+", " ", t)
-    t = re.sub(r"[^\w\s가-힣]", "", t)
-    return t
+# 메모리 절약 모드: 범주형 / Arrow 문자열 (좌표는 CSV 값이 바뀌지 않도록 float64 유지)
+try:
+    STRING_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    STRING_DTYPE = pd.StringDtype("python")
 
-df["name_key"] = df["restaurant_name"].map(norm_key)
-df["addr_key"] = df["address"].fillna("").map(norm_key)
-df = df.drop_duplicates(subset=["name_key","addr_key"]).reset_index(drop=True)
+def compact_frame(df):
+    if not COMPACT:
+        return df
+    for c in need_cols:
+        if c not in df.columns:
+            continue
+        if c in cat_cols:
+            df[c] = df[c].astype("category")
+        elif c not in num_cols:
+            df[c] = df[c].astype(STRING_DTYPE)
+    return df
 
-# 3. 결측치 처리
-# 음식의유형이 없으면 주된음식종류로 보완
-df["category"] = np.where(
-    df["category"].isna() | (df["category"].str.strip()==""),
-    df["menu"],
-    df["category"]
-)
-# 전화번호 빈칸 처리
-df["phone_number"] = df["phone_number"].replace({"": np.nan})
+_last_rss = [None]  # 직전 보고 시점 RSS (단계별 증감 계산용)
 
-# 4. 소재지주소에서 시/구 분리
+def process_rss_mb():
+    """(MB, 라벨): psutil이 있으면 현재 RSS, 없으면 프로세스 최대 RSS (macOS는 바이트, Linux는 KB 단위)"""
+    if psutil:
+        return psutil.Process().memory_info().rss / 2**20, "RSS"
+    if resource:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (2**20 if sys.platform == "darwin" else 2**10), "최대 RSS"
+    return None, None
+
+def report_memory(stage, df):
+    """단계별 DataFrame 크기, 프로세스 RSS(직전 단계 대비 증감), Arrow 메모리 풀 사용량 출력"""
+    msg = f"[메모리] {stage}: DataFrame {df.memory_usage(deep=True).sum() / 2**20:.1f}MB"
+    rss, label = process_rss_mb()
+    if rss is not None:
+        delta = f" ({rss - _last_rss[0]:+.0f}MB)" if _last_rss[0] is not None else ""
+        msg += f", 프로세스 {label} {rss:.0f}MB{delta}"
+        _last_rss[0] = rss
+    if pa:
+        pool = pa.default_memory_pool()
+        msg += f", Arrow {pool.bytes_allocated() / 2**20:.1f}MB (최대 {pool.max_memory() / 2**20:.1f}MB)"
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        msg += f", Python 힙 단계 최대 {peak / 2**20:.0f}MB"
+        tracemalloc.reset_peak()
+    print(msg)
+
+# 0. 엑셀 파일 로드 (필요한 컬럼만 읽고, 원본이 바뀌지 않았으면 Parquet 캐시 사용)
+def file_sha256(path, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(chunk):
+            h.update(block)
+    return h.hexdigest()
+
+def read_source_excel(path, cols):
+    try:
+        return pd.read_excel(path, usecols=cols, engine="calamine")  # python-calamine 설치 시 (가장 빠름)
+    except ImportError:
+        return pd.read_excel(path, usecols=cols, engine="openpyxl")  # read-only 모드로 읽음
+
+def load_source(path=SOURCE_XLSX, cols=need_cols, cache_path=SOURCE_CACHE):
+    stat = os.stat(path)
+    meta_path = f"{cache_path}.meta.json" if cache_path else None
+
+    # 캐시 확인: mtime/크기가 같으면 바로 사용, 다르면 해시로 내용 변경 여부 확인
+    if cache_path and os.path.exists(cache_path) and os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("cols") == cols:
+            fresh = meta.get("mtime") == stat.st_mtime and meta.get("size") == stat.st_size
+            if not fresh and meta.get("sha256") == file_sha256(path):
+                fresh = True
+                meta.update(mtime=stat.st_mtime, size=stat.st_size)
+                with open(meta_path, "w", encoding="utf-8") as f:
+                    json.dump(meta, f, ensure_ascii=False)
+            if fresh:
+                return pd.read_parquet(cache_path), True
+
+    df = read_source_excel(path, cols)
+
+    # 타입 고정: 좌표는 실수, 나머지는 문자열 (숫자로 읽힌 전화번호 등도 str() 결과로 보관)
+    for c in cols:
+        if c in num_cols:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+        else:
+            df[c] = df[c].astype(object).map(str, na_action="ignore")
+
+    if cache_path:
+        df.to_parquet(cache_path, index=False)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"cols": cols, "mtime": stat.st_mtime, "size": stat.st_size,
+                       "sha256": file_sha256(path)}, f, ensure_ascii=False)
+    return df, False
+
+# 행정구역 분리 (4단계)
+# (비교용) 행 단위 구현 - 벤치마크 기준
 def split_address(addr):
     tokens = str(addr).split()
     si, gu = None, None
@@ -38,10 +144,12 @@ def split_address(addr):
     if len(tokens) > 1: gu = tokens[1]
     return pd.Series([si, gu])
 
-df[["ctp_kor_nm","sig_kor_nm"]] = df["address"].apply(split_address)
+def split_address_vec(addr):
+    addr = addr.astype(object)
+    tokens = addr.where(addr.notna(), "nan").map(str).str.split(n=2)  # 결측 주소는 str(nan)과 같이 "nan"
+    return tokens.str[0], tokens.str[1]
 
-# 5. 전화번호 표준화
-# ---------------------------
+# 전화번호 표준화 (5단계)
 # 지역번호 매핑 테이블
 area_code_map = {
     "서울특별시": "02",
@@ -63,6 +171,7 @@ area_code_map = {
     "제주특별자치도": "064",
 }
 
+# (비교용) 행 단위 구현 - 벤치마크 기준
 def normalize_phone_with_area(phone, si):
     if pd.isna(phone) or not str(phone).strip():
         return np.nan
@@ -96,7 +205,228 @@ def normalize_phone_with_area(phone, si):
                 return f"{area_code}-{digits[:4]}-{digits[4:]}"
     return digits
 
-df["phone_number"] = df.apply(lambda r: normalize_phone_with_area(r["phone_number"], r["ctp_kor_nm"]), axis=1)
+def normalize_phone_with_area_vec(phone, si):
+    """normalize_phone_with_area와 같은 규칙을 컬럼 단위로 적용"""
+    raw = phone.astype(object).map(str, na_action="ignore")
+    blank = phone.isna() | (raw.str.strip() == "")
+    digits = raw.str.replace(r"\D", "", regex=True).fillna("")
+    n = digits.str.len()
+    area = si.astype(object).map(area_code_map).fillna("")
+    has_area = area != ""
+
+    conds = [
+        digits.str.startswith("02") & (n == 9),   # 1) 서울(02)
+        digits.str.startswith("02") & (n == 10),
+        digits.str.startswith("0") & (n == 10),   # 2) 타지역 (0XX)
+        digits.str.startswith("0") & (n == 11),
+        has_area & (n == 7),                      # 3) 지역번호 누락
+        has_area & (n == 8),
+    ]
+    choices = [
+        "02-" + digits.str[2:5] + "-" + digits.str[5:],
+        "02-" + digits.str[2:6] + "-" + digits.str[6:],
+        digits.str[:3] + "-" + digits.str[3:6] + "-" + digits.str[6:],
+        digits.str[:3] + "-" + digits.str[3:7] + "-" + digits.str[7:],
+        area + "-" + digits.str[:3] + "-" + digits.str[3:],
+        area + "-" + digits.str[:4] + "-" + digits.str[4:],
+    ]
+    out = np.select(
+        [c.to_numpy(dtype=bool) for c in conds],
+        [c.to_numpy(dtype=object) for c in choices],
+        default=digits.to_numpy(dtype=object),
+    )
+    return pd.Series(out, index=phone.index, dtype=object).mask(blank.to_numpy(), np.nan)
+
+# (선택) 행 단위 구현과 동일성 검증 + 속도 비교 (원본 파일 없이 합성 데이터로 실행)
+def benchmark_preprocess(n=300_000, seed=0):
+    rng = np.random.default_rng(seed)
+    sido = list(area_code_map) + ["알수없음"]
+    phones = np.array([
+        "02-123-4567", "0212345678", "051 123 4567", "031-1234-5678", "010-1234-5678",
+        "123-4567", "12345678", "(054)234-5678", "12345", "", " ", None, np.nan, 212345678.0,
+    ], dtype=object)
+    addr = pd.Series([
+        f"{sido[a]} 중구 세종대로 {b}" if b % 7 else ("" if b % 2 else np.nan)
+        for a, b in zip(rng.integers(0, len(sido), n), rng.integers(0, 1000, n))
+    ])
+    phone = pd.Series(phones[rng.integers(0, len(phones), n)])
+
+    start = time.perf_counter()
+    ref_addr = addr.apply(split_address)
+    ref_phone = pd.Series([normalize_phone_with_area(p, s) for p, s in zip(phone, ref_addr[0])])
+    loop_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    si, gu = split_address_vec(addr)
+    vec_phone = normalize_phone_with_area_vec(phone, si)
+    vec_sec = time.perf_counter() - start
+
+    same = lambda a, b: bool((a.isna() & b.isna() | (a == b)).all())
+    assert same(ref_addr[0], si) and same(ref_addr[1], gu), "주소 분리 결과 불일치"
+    assert same(ref_phone, vec_phone), "전화번호 표준화 결과 불일치"
+    print(f"📊 전화번호/주소 처리 {n}행: 행 단위 {loop_sec:.2f}초 / 벡터 {vec_sec:.2f}초 "
+          f"({loop_sec / vec_sec:.1f}배), 결과 동일")
+
+if RUN_BENCHMARK:
+    benchmark_preprocess()
+    raise SystemExit
+
+if MEMORY_TRACE:
+    tracemalloc.start()
+start = time.perf_counter()
+df_raw, from_cache = load_source()
+print(f"원본 로드 {time.perf_counter() - start:.2f}초 ({'캐시' if from_cache else '엑셀'})")
+
+# 1. 필요한 컬럼만 선택
+df = compact_frame(df_raw[need_cols].copy())
+del df_raw
+report_memory("로드", df)
+
+# 2. 업소명+주소(도로명주소+소재지주소) 기준 중복 제거
+def norm_key(x):
+    t = str(x).strip().lower()
+    t = re.sub(r"\s+", " ", t)
+    t = re.sub(r"[^\w\s가-힣]", "", t)
+    return t
+
+df["name_key"] = df["restaurant_name"].map(norm_key)
+df["addr_key"] = df["address"].fillna("").map(norm_key)
+df = df.drop_duplicates(subset=["name_key","addr_key"]).reset_index(drop=True)
+
+# 2-1. 근접 중복 탐지 (지점명 유무, 지번/도로명 주소 차이 등)
+#      시군구/읍면동 + 좌표 격자로 후보를 묶고(blocking), 블록 안(및 인접 격자)에서만 비교
+BRANCH_SUFFIX = re.compile(r"(본점|본관|직영점)$")
+
+def ngrams(s, n=2):
+    return {s[i:i+n] for i in range(len(s) - n + 1)} or ({s} if s else set())
+
+def dice_sim(a, b):
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+def numbers(s):
+    return tuple(re.findall(r"\d+", s))
+
+def haversine_m(lon1, lat1, lon2, lat2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    h = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(h))
+
+def find_near_duplicates(df):
+    """행별 클러스터 번호(단독 행은 -1)와 매칭 쌍 수 반환"""
+    n = len(df)
+    name_core = [BRANCH_SUFFIX.sub("", k.replace(" ", "")) for k in df["name_key"]]
+    addr_core = [k.replace(" ", "") for k in df["addr_key"]]
+    names = [ngrams(k) for k in name_core]
+    addrs = [ngrams(k) for k in addr_core]
+    name_nums = [numbers(k) for k in df["name_key"]]  # "1호점" vs "2호점"처럼 숫자가 다르면 다른 업소
+    addr_nums = [numbers(k) for k in df["addr_key"]]
+    first = [k[:1] for k in name_core]
+    lon = pd.to_numeric(df["lon"], errors="coerce").to_numpy(dtype=float)
+    lat = pd.to_numeric(df["lat"], errors="coerce").to_numpy(dtype=float)
+    has_xy = ~(np.isnan(lon) | np.isnan(lat))
+    cx = np.where(has_xy, np.floor(np.nan_to_num(lon) / NEAR_DUP_GRID_DEG), 0).astype(np.int64)
+    cy = np.where(has_xy, np.floor(np.nan_to_num(lat) / NEAR_DUP_GRID_DEG), 0).astype(np.int64)
+    sig = df["sig_kor_nm"].astype(object).fillna("").astype(str).tolist()
+    emd = df["emd_kor_nm"].astype(object).fillna("").astype(str).tolist()
+
+    blocks = defaultdict(list)
+    for i in range(n):
+        # 업소명 숫자가 다르면 비교할 필요가 없으므로 블록 키에 포함
+        key = (sig[i], emd[i], name_nums[i]) + ((int(cx[i]), int(cy[i])) if has_xy[i] else (None, None))
+        blocks[key].append(i)
+
+    parent = list(range(n))
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    matched = 0
+    def compare(a, b=None):
+        pairs = len(a) * (len(a) - 1) // 2 if b is None else len(a) * len(b)
+        if pairs > NEAR_DUP_MAX_PAIRS:  # 같은 좌표에 몰린 행(지오코딩 실패 등)이 많으면 첫 글자로 분할
+            sub_a, sub_b = defaultdict(list), defaultdict(list)
+            for i in a: sub_a[first[i]].append(i)
+            for j in (b or []): sub_b[first[j]].append(j)
+            for ch, members in sub_a.items():
+                if b is None:
+                    if len(members) < len(a): compare(members)
+                    else: _compare(members, None)
+                elif ch in sub_b:
+                    _compare(members, sub_b[ch])
+            return
+        _compare(a, b)
+
+    def _compare(a, b):
+        nonlocal matched
+        for pos, i in enumerate(a):
+            for j in (a[pos+1:] if b is None else b):
+                if dice_sim(names[i], names[j]) < NEAR_DUP_NAME_SIM:
+                    continue
+                if has_xy[i] and has_xy[j]:
+                    ok = haversine_m(lon[i], lat[i], lon[j], lat[j]) <= NEAR_DUP_MAX_DIST_M
+                else:
+                    # 좌표가 없으면 주소 유사도 + 번지 숫자(짧은 쪽 기준 앞부분) 일치
+                    k = min(len(addr_nums[i]), len(addr_nums[j]))
+                    ok = (addr_nums[i][:k] == addr_nums[j][:k]
+                          and dice_sim(addrs[i], addrs[j]) >= NEAR_DUP_ADDR_SIM)
+                if ok:
+                    matched += 1
+                    parent[find(j)] = find(i)
+
+    for (s, e, nums, x, y), members in blocks.items():
+        compare(members)
+        if x is None:
+            continue
+        for dx, dy in ((1, -1), (1, 0), (1, 1), (0, 1)):  # 인접 격자는 한 방향만 비교(중복 비교 방지)
+            nb = blocks.get((s, e, nums, x + dx, y + dy))
+            if nb:
+                compare(members, nb)
+
+    roots = np.array([find(i) for i in range(n)], dtype=np.int64)
+    _, inverse, counts = np.unique(roots, return_inverse=True, return_counts=True)
+    multi = counts[inverse] > 1
+    cluster = np.full(n, -1, dtype=np.int64)
+    cluster[multi] = pd.factorize(roots[multi])[0]
+    return cluster, matched
+
+start = time.perf_counter()
+df["dup_cluster"], near_dup_pairs = find_near_duplicates(df)
+dup_rows = df[df["dup_cluster"] >= 0]
+report = dup_rows[["dup_cluster","restaurant_name","address","lon","lat","sig_kor_nm","emd_kor_nm"]].copy()
+report["kept"] = ~dup_rows.duplicated(subset="dup_cluster")
+report.sort_values(["dup_cluster","kept"], ascending=[True, False]).to_csv(NEAR_DUP_REPORT, index=False, encoding="utf-8-sig")
+print(f"근접 중복: 매칭 {near_dup_pairs}쌍, 클러스터 {report['dup_cluster'].nunique()}개, "
+      f"제거 대상 {int((~report['kept']).sum())}행 ({time.perf_counter() - start:.2f}초) → {NEAR_DUP_REPORT}")
+if NEAR_DUP_DROP:
+    df = df[(df["dup_cluster"] < 0) | ~df.duplicated(subset="dup_cluster")].reset_index(drop=True)
+df = df.drop(columns=["name_key","addr_key","dup_cluster"])  # 임시 컬럼 즉시 제거
+del report, dup_rows
+report_memory("중복 제거", df)
+
+# 3. 결측치 처리
+# 음식의유형이 없으면 주된음식종류로 보완
+df["category"] = np.where(
+    df["category"].isna() | (df["category"].str.strip()==""),
+    df["menu"],
+    df["category"]
+)
+# 전화번호 빈칸 처리
+df["phone_number"] = df["phone_number"].replace({"": np.nan})
+df = compact_frame(df)
+
+# 4. 소재지주소에서 시/구 분리
+df["ctp_kor_nm"], df["sig_kor_nm"] = split_address_vec(df["address"])
+df = compact_frame(df)
+report_memory("결측치/행정구역", df)
+
+# 5. 전화번호 표준화
+df["phone_number"] = normalize_phone_with_area_vec(df["phone_number"], df["ctp_kor_nm"])
+df = compact_frame(df)
+report_memory("전화번호", df)
 
 # 6. 최종 CSV 저장
 df_final = df[[
@@ -105,4 +435,4 @@ df_final = df[[
 ]]
 df_final.to_csv("restaurant_clean.csv", index=False, encoding="utf-8")
 
-print("전처리 완료 → restaurant_clean.csv 저장됨")
\ No newline at end of file
+print("전처리 완료 → restaurant_clean.csv 저장됨")
@@ -1,11 +1,51 @@
 import requests
+import aiohttp
+import asyncio
+import concurrent.futures
 import pandas as pd
+import numpy as np
 import re
 import time
+import json
+import sqlite3
+import os
+import glob
+import random
+from collections import deque
 
-# 네이버 API 인증키
-client_id = NAVER_CLIENT_ID
-client_secret = NAVER_CLIENT_SECRET
+# 네이버 API 인증키 (애플리케이션 키를 여러 개 등록하면 나눠서 사용)
+NAVER_CREDENTIALS = [
+    (NAVER_CLIENT_ID, NAVER_CLIENT_SECRET),
+]
+
+# ✅ 실행 설정
+API_URL = "https://openapi.naver.com/v1/search/local.json"  # 로컬 mock 서버 테스트 시 교체
+USE_ASYNC = True        # False면 기존 순차 호출(time.sleep(0.2)) 방식
+MAX_RPS = 10            # 초당 최대 요청 수 (토큰 버킷)
+MAX_CONCURRENCY = 20    # 동시에 진행 중인 최대 요청 수 (커넥션 풀 크기, 자동 조절 상한)
+INITIAL_CONCURRENCY = 5  # 시작 동시 요청 수 (오류율에 따라 MIN~MAX 사이에서 자동 조절)
+MIN_CONCURRENCY = 1
+ADAPT_WINDOW = 20       # 몇 건의 응답마다 동시 요청 수를 조정할지
+ADAPT_ERROR_RATE = 0.05  # 구간 오류율이 이 값을 넘으면 동시 요청 수를 절반으로
+RETRY_MAX_ATTEMPTS = 5  # 일시 오류(429/5xx/타임아웃) 최대 시도 횟수
+RETRY_BASE_DELAY = 0.5  # 지수 백오프 기본 대기(초)
+RETRY_MAX_DELAY = 30    # 지수 백오프 최대 대기(초)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+CANDIDATES = 5          # 검색어당 후보 수 (Local API display 최대 5)
+NAME_WEIGHT = 0.6       # 신뢰도 = 이름 유사도 * NAME_WEIGHT + 거리 점수 * (1 - NAME_WEIGHT)
+GEO_SCALE_M = 300       # 거리 점수 감쇠 거리(m): exp(-거리 / GEO_SCALE_M)
+LOW_CONFIDENCE = 0.5    # 이 값 미만(또는 매칭 없음)이면 매칭 검토 대상으로 집계
+CACHE_PATH = "naver_local_cache.sqlite"  # None이면 캐시 미사용
+CACHE_TTL_DAYS = 30         # 검색 결과 캐시 유효기간
+CACHE_NEGATIVE_TTL_DAYS = 7  # "검색 결과 없음" 캐시 유효기간
+CHECKPOINT_DIR = "api_checkpoint"  # None이면 체크포인트 미사용
+CHECKPOINT_CHUNK = 500  # 몇 건마다 파트 파일로 기록할지
+RESUME = True           # True면 체크포인트에 기록된 행은 건너뜀
+KEY_DAILY_LIMIT = 25000  # 키별 일일 호출 한도 (검색 API 기본 25,000건)
+KEY_STRATEGY = "least_used"  # "least_used" 또는 "round_robin"
+KEY_USAGE_PATH = "naver_key_usage.json"  # 키별 당일 사용량 기록 (재시작 시 이어서 집계)
+QUOTA_ERROR_CODES = {"010"}  # 일일 한도 초과 errorCode
+RUN_BENCHMARK = False   # True면 결과 반영 방식 벤치마크만 실행 후 종료
 
 # ✅ 주소 정제 함수 (도로명주소만 추출, 건물명/층수 제거)
 def clean_address(addr):
@@ -16,21 +56,586 @@ def clean_address(addr):
     return addr.strip()
 
 
-# ✅ 네이버 Local API 호출
-def get_store_info(query):
-    url = "https://openapi.naver.com/v1/search/local.json"
-    headers = {
-        "X-Naver-Client-Id": client_id,
-        "X-Naver-Client-Secret": client_secret
+# ✅ 캐시 키용 검색어 정규화
+def normalize_query(query):
+    return " ".join(str(query).split()).lower()
+
+
+# ✅ 저장된 응답을 후보 리스트로 통일 (이전 버전은 첫 번째 item만 저장)
+def as_candidates(value):
+    if not value:
+        return []
+    if isinstance(value, dict):
+        return [value]
+    return value
+
+
+# ✅ 호출 계획: 정규화된 검색어가 같은 행을 묶어 한 번만 호출
+def plan_queries(queries, rows):
+    """rows(행 번호) 중 정규화 검색어가 같은 것끼리 묶어 (고유 검색어 리스트, 검색어별 행 번호 리스트) 반환"""
+    groups = {}
+    for i in rows:
+        groups.setdefault(normalize_query(queries[i]), []).append(i)
+    unique_queries = [queries[members[0]] for members in groups.values()]
+    return unique_queries, list(groups.values())
+
+
+# ✅ 검색 결과 영구 캐시 (SQLite)
+class ResponseCache:
+    def __init__(self, path=CACHE_PATH, ttl_days=CACHE_TTL_DAYS, negative_ttl_days=CACHE_NEGATIVE_TTL_DAYS):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS local_cache ("
+            "query TEXT PRIMARY KEY, item TEXT, fetched_at REAL)"
+        )
+        self.ttl = ttl_days * 86400
+        self.negative_ttl = negative_ttl_days * 86400
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def get(self, query):
+        """(hit 여부, 후보 리스트 또는 None) 반환. 만료된 항목은 미스로 처리"""
+        row = self.conn.execute(
+            "SELECT item, fetched_at FROM local_cache WHERE query = ?", (normalize_query(query),)
+        ).fetchone()
+        if row:
+            item, fetched_at = row
+            ttl = self.ttl if item is not None else self.negative_ttl
+            if time.time() - fetched_at < ttl:
+                self.hits += 1
+                if item is None:
+                    self.negative_hits += 1
+                    return True, None
+                return True, as_candidates(json.loads(item))
+        self.misses += 1
+        return False, None
+
+    def set(self, query, item):
+        """item이 None 또는 빈 리스트면 "검색 결과 없음"으로 저장 (negative cache)"""
+        value = json.dumps(item, ensure_ascii=False) if item else None
+        self.conn.execute(
+            "INSERT OR REPLACE INTO local_cache (query, item, fetched_at) VALUES (?, ?, ?)",
+            (normalize_query(query), value, time.time())
+        )
+        self.conn.commit()
+        self.writes += 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        ratio = self.hits / total * 100 if total else 0.0
+        return (f"캐시 히트 {self.hits}건(결과 없음 {self.negative_hits}건), "
+                f"미스 {self.misses}건, 저장 {self.writes}건, 히트율 {ratio:.1f}%")
+
+    def close(self):
+        self.conn.close()
+
+
+# ✅ 체크포인트 (JSONL 파트 파일, 청크 단위 기록)
+class Checkpoint:
+    def __init__(self, path=CHECKPOINT_DIR, chunk_size=CHECKPOINT_CHUNK):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.buffer = []
+        os.makedirs(path, exist_ok=True)
+        self.part = len(self._parts())
+
+    def _parts(self):
+        return sorted(glob.glob(os.path.join(self.path, "part-*.jsonl")))
+
+    def load(self):
+        """{행 번호: {"row", "query", "item"}} 반환"""
+        done = {}
+        for part in self._parts():
+            with open(part, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 기록 도중 중단된 줄
+                    rec["item"] = as_candidates(rec["item"])
+                    done[rec["row"]] = rec
+        return done
+
+    def clear(self):
+        for part in self._parts():
+            os.remove(part)
+        self.part = 0
+
+    def add(self, row, query, item):
+        self.buffer.append({"row": row, "query": query, "item": item})
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        part_path = os.path.join(self.path, f"part-{self.part:05d}.jsonl")
+        tmp_path = part_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for rec in self.buffer:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, part_path)  # 완성된 파트만 보이도록 원자적 교체
+        self.part += 1
+        self.buffer = []
+
+
+# ✅ 인증키 풀 (키별 당일 호출 수 집계, 한도 초과 키는 제외)
+class KeyPoolExhausted(Exception):
+    pass
+
+
+class KeyPool:
+    def __init__(self, credentials, daily_limit=KEY_DAILY_LIMIT, strategy=KEY_STRATEGY, path=KEY_USAGE_PATH):
+        self.credentials = dict(credentials)
+        self.order = list(self.credentials)
+        self.daily_limit = daily_limit
+        self.strategy = strategy
+        self.path = path
+        self.next = 0
+        self.date = time.strftime("%Y-%m-%d")
+        self.calls = {cid: 0 for cid in self.order}
+        self.exhausted = set()
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("date") != self.date:  # 날짜가 바뀌면 새로 집계
+            return
+        for cid, n in saved.get("calls", {}).items():
+            if cid in self.calls:
+                self.calls[cid] = n
+        self.exhausted = set(saved.get("exhausted", [])) & set(self.order)
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"date": self.date, "calls": self.calls, "exhausted": sorted(self.exhausted)}, f)
+        os.replace(tmp_path, self.path)
+
+    def _rollover(self):
+        today = time.strftime("%Y-%m-%d")
+        if today != self.date:
+            self.date = today
+            self.calls = {cid: 0 for cid in self.order}
+            self.exhausted = set()
+
+    def acquire(self):
+        """호출에 사용할 (client_id, 요청 헤더) 반환. 사용 가능한 키가 없으면 KeyPoolExhausted"""
+        self._rollover()
+        available = [cid for cid in self.order
+                     if cid not in self.exhausted and self.calls[cid] < self.daily_limit]
+        if not available:
+            raise KeyPoolExhausted("사용 가능한 API 키가 없습니다 (모든 키 일일 한도 소진)")
+
+        if self.strategy == "round_robin":
+            cid = next(c for c in self.order[self.next:] + self.order[:self.next] if c in available)
+            self.next = (self.order.index(cid) + 1) % len(self.order)
+        else:
+            cid = min(available, key=lambda c: self.calls[c])
+
+        self.calls[cid] += 1
+        self._save()
+        headers = {
+            "X-Naver-Client-Id": cid,
+            "X-Naver-Client-Secret": self.credentials[cid]
+        }
+        return cid, headers
+
+    def mark_exhausted(self, cid):
+        print(f"🔑 키 한도 초과 → 제외: {cid[:6]}…")
+        self.exhausted.add(cid)
+        self._save()
+
+    def stats(self):
+        return ", ".join(
+            f"{cid[:6]}… {self.calls[cid]}건" + (" (소진)" if cid in self.exhausted else "")
+            for cid in self.order
+        )
+
+
+def is_quota_error(body):
+    return str(body.get("errorCode", "")) in QUOTA_ERROR_CODES
+
+
+key_pool = KeyPool(NAVER_CREDENTIALS)
+
+
+# ✅ 네이버 Local API 호출 (200 이외 응답은 예외 발생)
+def get_store_info(query, url=API_URL, cache=None, keys=None):
+    keys = keys or key_pool
+    params = {"query": query, "display": CANDIDATES}
+    while True:
+        cid, headers = keys.acquire()
+        response = requests.get(url, headers=headers, params=params)
+        if response.status_code == 429:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            if is_quota_error(body):
+                keys.mark_exhausted(cid)  # 다른 키로 재시도
+                continue
+        response.raise_for_status()
+        break
+
+    data = response.json()
+    items = data.get("items") or []
+    if cache is not None:
+        cache.set(query, items)  # 정상 응답만 저장 (오류 응답은 저장하지 않음)
+    return items
+
+
+# ✅ 일시 오류 판단 (속도 제한/서버 오류/연결 오류는 재시도, 그 외는 실패 처리)
+def is_retryable(e):
+    if isinstance(e, requests.HTTPError):
+        return e.response.status_code in RETRYABLE_STATUS
+    if isinstance(e, aiohttp.ClientResponseError):
+        return e.status in RETRYABLE_STATUS
+    return isinstance(e, (requests.ConnectionError, requests.Timeout,
+                          aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """지수 백오프 + full jitter"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def fetch_all_sync(queries, url=API_URL, cache=None, on_result=None, keys=None):
+    """순차 호출. on_result(i, items)은 정상 응답에 대해서만 호출"""
+    results = [None] * len(queries)
+    for i, query in enumerate(queries):
+        try:
+            for attempt in range(RETRY_MAX_ATTEMPTS):
+                try:
+                    results[i] = get_store_info(query, url, cache, keys)
+                except requests.RequestException as e:
+                    if not is_retryable(e) or attempt == RETRY_MAX_ATTEMPTS - 1:
+                        print(f"⚠️ 요청 실패: {query} ({e})")
+                        break
+                    time.sleep(backoff_delay(attempt))
+                    continue
+                if on_result:
+                    on_result(i, results[i])
+                break
+        except KeyPoolExhausted as e:
+            print(f"⛔ {e} → 호출 중단")
+            break
+        time.sleep(0.2)  # rate-limit 고려
+    return results
+
+
+# ✅ 토큰 버킷 (초당 rate개 충전, 최대 burst개 적재)
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# ✅ 동시 요청 수 자동 조절 (AIMD: 구간 오류율이 낮으면 +1, 높으면 절반)
+class AdaptiveConcurrency:
+    def __init__(self, initial=INITIAL_CONCURRENCY, minimum=MIN_CONCURRENCY, maximum=MAX_CONCURRENCY,
+                 window=ADAPT_WINDOW, error_rate=ADAPT_ERROR_RATE):
+        self.limit = max(minimum, min(initial, maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.window = window
+        self.error_rate = error_rate
+        self.ok = 0
+        self.errors = 0
+        self.retries = 0
+        self.failures = 0
+        self.peak = self.limit
+
+    def record(self, ok):
+        if ok:
+            self.ok += 1
+        else:
+            self.errors += 1
+        if self.ok + self.errors < self.window:
+            return
+        if self.errors / (self.ok + self.errors) > self.error_rate:
+            self.limit = max(self.minimum, self.limit // 2)
+        else:
+            self.limit = min(self.maximum, self.limit + 1)
+        self.peak = max(self.peak, self.limit)
+        self.ok = 0
+        self.errors = 0
+
+    def stats(self):
+        return (f"동시 요청 수 {self.limit} (최대 {self.peak}), "
+                f"재시도 {self.retries}건, 최종 실패 {self.failures}건")
+
+
+# ✅ 네이버 Local API 비동기 호출 (공유 세션 사용)
+async def get_store_info_async(session, bucket, query, url=API_URL, cache=None, keys=None):
+    keys = keys or key_pool
+    params = {"query": query, "display": CANDIDATES}
+    while True:
+        cid, headers = keys.acquire()
+        await bucket.acquire()
+        async with session.get(url, params=params, headers=headers) as response:
+            if response.status == 429:
+                try:
+                    body = await response.json(content_type=None)
+                except ValueError:
+                    body = {}
+                if is_quota_error(body):
+                    keys.mark_exhausted(cid)  # 다른 키로 재시도
+                    continue
+            response.raise_for_status()
+            data = await response.json(content_type=None)
+        break
+    items = data.get("items") or []
+    if cache is not None:
+        cache.set(query, items)
+    return items
+
+
+async def fetch_all_async(queries, rps=MAX_RPS, concurrency=MAX_CONCURRENCY, url=API_URL, cache=None,
+                          on_result=None, keys=None, controller=None):
+    """queries 순서대로 후보 리스트 반환 (실패 시 None). on_result(i, items)은 정상 응답에 대해서만 호출"""
+    controller = controller or AdaptiveConcurrency(maximum=concurrency)
+    bucket = TokenBucket(rps)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=30)
+    results = [None] * len(queries)
+    todo = deque(enumerate(queries))
+    stopped = []
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def fetch_one(i, query):
+            for attempt in range(RETRY_MAX_ATTEMPTS):
+                try:
+                    results[i] = await get_store_info_async(session, bucket, query, url, cache, keys)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    controller.record(False)
+                    if not is_retryable(e) or attempt == RETRY_MAX_ATTEMPTS - 1:
+                        controller.failures += 1
+                        print(f"⚠️ 요청 실패: {query} ({e})")
+                        return
+                    controller.retries += 1
+                    await asyncio.sleep(backoff_delay(attempt))
+                    continue
+                controller.record(True)
+                if on_result:
+                    on_result(i, results[i])
+                return
+
+        # 워커 수는 상한(concurrency)만큼 띄우고, 번호가 현재 허용치 이상인 워커는 대기
+        async def worker(wid):
+            while todo and not stopped:
+                if wid >= controller.limit:
+                    await asyncio.sleep(0.5)
+                    continue
+                i, query = todo.popleft()
+                try:
+                    await fetch_one(i, query)
+                except KeyPoolExhausted as e:
+                    if not stopped:
+                        print(f"⛔ {e} → 호출 중단")
+                    stopped.append(e)
+
+        await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    return results
+
+
+def run_async(coro):
+    """asyncio.run 래퍼 (Colab/Jupyter처럼 이미 루프가 돌고 있으면 별도 스레드에서 실행)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, coro).result()
+
+
+# ✅ 후보 점수 계산 (이름 유사도 + 좌표 거리)
+def name_key(s):
+    s = re.sub(r"<[^>]+>", "", str(s)).lower()  # 검색어 강조 태그(<b>) 제거
+    return re.sub(r"[^\w가-힣]", "", s)
+
+
+def bigram_similarity(a, b):
+    """문자 bigram Dice 계수 (0~1)"""
+    if a == b:
+        return 1.0 if a else 0.0
+    ga = {a[k:k + 2] for k in range(len(a) - 1)} or {a}
+    gb = {b[k:k + 2] for k in range(len(b) - 1)} or {b}
+    return 2 * len(ga & gb) / (len(ga) + len(gb))
+
+
+def haversine_m(lon1, lat1, lon2, lat2):
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371000 * np.arcsin(np.sqrt(h))
+
+
+def select_best_candidates(df, results):
+    """행별 후보 중 최고 점수 후보 선택. (best item 리스트, 신뢰도 Series, 거리 Series) 반환"""
+    best = [None] * len(results)
+    confidence = pd.Series(np.nan, index=df.index)
+    distance = pd.Series(np.nan, index=df.index)
+
+    # 행 x 후보를 한 프레임으로 펼쳐서 한 번에 점수 계산
+    flat = [(i, k, c) for i, cands in enumerate(results) for k, c in enumerate(cands or [])]
+    if not flat:
+        return best, confidence, distance
+    rows = np.array([i for i, _, _ in flat])
+    cand = pd.DataFrame({
+        "row": rows,
+        "title": [c.get("title", "") for _, _, c in flat],
+        "mapx": pd.to_numeric([c.get("mapx") for _, _, c in flat], errors="coerce"),
+        "mapy": pd.to_numeric([c.get("mapy") for _, _, c in flat], errors="coerce"),
+    })
+    names = df["restaurant_name"].map(name_key).to_numpy()[rows]
+    cand["name_sim"] = [bigram_similarity(n, name_key(t)) for n, t in zip(names, cand["title"])]
+
+    # mapx/mapy는 WGS84 경위도 * 1e7
+    if {"lon", "lat"} <= set(df.columns):
+        lon = pd.to_numeric(df["lon"], errors="coerce").to_numpy()[rows]
+        lat = pd.to_numeric(df["lat"], errors="coerce").to_numpy()[rows]
+        cand["distance_m"] = haversine_m(lon, lat, cand["mapx"] / 1e7, cand["mapy"] / 1e7)
+    else:
+        cand["distance_m"] = np.nan
+    geo_score = np.exp(-cand["distance_m"] / GEO_SCALE_M)
+    cand["score"] = (NAME_WEIGHT * cand["name_sim"] + (1 - NAME_WEIGHT) * geo_score).fillna(cand["name_sim"])
+
+    top = cand.loc[cand.groupby("row")["score"].idxmax()]
+    for pos, row in zip(top.index, top["row"]):
+        best[row] = flat[pos][2]
+    confidence.iloc[top["row"].to_numpy()] = top["score"].round(3).to_numpy()
+    distance.iloc[top["row"].to_numpy()] = top["distance_m"].round(1).to_numpy()
+    return best, confidence, distance
+
+
+# ✅ API 응답 필드 → 결과 컬럼
+API_FIELDS = {
+    "title": "api_title",
+    "link": "api_link",
+    "description": "api_description",
+    "telephone": "api_telephone",
+    "address": "api_address",
+    "roadAddress": "api_roadAddress",
+    "mapx": "api_mapx",
+    "mapy": "api_mapy",
+}
+
+
+# ✅ 검색 결과를 한 번에 반영 (벡터 연산)
+def assemble_results(df, clean_addrs, results):
+    matched = [i for i, r in enumerate(results) if r]
+    if not matched:
+        return df
+
+    index = df.index[matched]
+    raw = pd.DataFrame([results[i] for i in matched], index=index)
+    raw = raw.reindex(columns=list(API_FIELDS) + ["category"]).fillna("")
+
+    out = raw[list(API_FIELDS)].rename(columns=API_FIELDS)
+    out["cleaned_address"] = [clean_addrs[i] for i in matched]
+
+    # ✅ 카테고리 분리 (대분류 > ... > 소분류)
+    raw_category = raw["category"].astype(str)
+    has_sep = raw_category.str.contains(">", regex=False)
+    parts = raw_category.str.split(">")
+    out["category"] = parts.str[0].str.strip().where(has_sep, raw_category)
+    out["menu"] = parts.str[-1].str.strip().where(has_sep, "")
+
+    # 입력에 없는 컬럼(category/menu 등)은 행 단위 df.at처럼 새로 추가 (미매칭 행은 NaN)
+    for col in out.columns:
+        if col not in df.columns:
+            df[col] = pd.Series(out[col].tolist(), index=out.index)  # dtype은 새 값 기준으로 추론
+
+    # 값이 모두 비어 float로 읽힌 컬럼에도 문자열이 들어가도록 변환
+    numeric_cols = [c for c in out.columns if pd.api.types.is_numeric_dtype(df[c])]
+    df[numeric_cols] = df[numeric_cols].astype(object)
+
+    df.loc[index, out.columns] = out
+    return df
+
+
+# ✅ (비교용) 행 단위 반영 - 벤치마크 기준 구현
+def apply_result(df, idx, clean_addr, result):
+    df.at[idx, "cleaned_address"] = clean_addr
+    df.at[idx, "api_title"] = result.get("title", "")
+    df.at[idx, "api_link"] = result.get("link", "")
+
+    # ✅ 카테고리 분리
+    raw_category = result.get("category", "")
+    if ">" in raw_category:
+        parts = [p.strip() for p in raw_category.split(">")]
+        df.at[idx, "category"] = parts[0]  # 대분류
+        df.at[idx, "menu"] = parts[-1]     # 소분류
+    else:
+        df.at[idx, "category"] = raw_category
+        df.at[idx, "menu"] = ""
+
+    df.at[idx, "api_description"] = result.get("description", "")
+    df.at[idx, "api_telephone"] = result.get("telephone", "")
+    df.at[idx, "api_address"] = result.get("address", "")
+    df.at[idx, "api_roadAddress"] = result.get("roadAddress", "")
+    df.at[idx, "api_mapx"] = result.get("mapx", "")
+    df.at[idx, "api_mapy"] = result.get("mapy", "")
+
+
+# ✅ 결과 반영 벤치마크 (행 단위 df.at vs 벡터 연산)
+def benchmark_assembly(n=100_000):
+    sample = {
+        "title": "모범식당", "link": "", "category": "한식>백반,가정식", "description": "",
+        "telephone": "02-123-4567", "address": "서울특별시 중구 태평로1가 31",
+        "roadAddress": "서울특별시 중구 세종대로 110", "mapx": "1269783882", "mapy": "375666103",
     }
-    params = {"query": query, "display": 1}
-    response = requests.get(url, headers=headers, params=params)
+    results = [dict(sample) if i % 5 else None for i in range(n)]  # 20%는 검색 결과 없음
+    clean_addrs = ["서울특별시 중구 세종대로 110"] * n
+    cols = ["restaurant_name", "address", "category", "menu", "cleaned_address",
+            "api_category"] + list(API_FIELDS.values())
+
+    # 입력 시트에 category/menu 컬럼이 없는 경우도 같은 결과인지 확인
+    for base_cols in (cols, [c for c in cols if c not in ("category", "menu")]):
+        base = pd.DataFrame({c: [""] * n for c in base_cols})
+
+        df_loop = base.copy()
+        start = time.perf_counter()
+        for idx, clean_addr, result in zip(df_loop.index, clean_addrs, results):
+            if result:
+                apply_result(df_loop, idx, clean_addr, result)
+        loop_sec = time.perf_counter() - start
+
+        df_vec = base.copy()
+        start = time.perf_counter()
+        assemble_results(df_vec, clean_addrs, results)
+        vec_sec = time.perf_counter() - start
+
+        pd.testing.assert_frame_equal(df_loop, df_vec)
+        label = "" if "category" in base_cols else " (category/menu 컬럼 없는 입력)"
+        print(f"📊 결과 반영 {n}행{label}: 행 단위 {loop_sec:.2f}초 / 벡터 {vec_sec:.2f}초 "
+              f"({loop_sec / vec_sec:.1f}배)")
+
 
-    if response.status_code == 200:
-        data = response.json()
-        if data.get("items"):
-            return data["items"][0]
-    return None
+if RUN_BENCHMARK:
+    benchmark_assembly()
+    raise SystemExit
 
 # ✅ 엑셀 불러오기 (엑셀에 반드시 "상호명","도로명주소" 컬럼 있어야 함)
 df = pd.read_excel("input.xlsx")
@@ -44,36 +649,105 @@ for col in new_cols:
     if col not in df.columns:
         df[col] = ""
 
-# ✅ 각 행 처리
-for idx, row in df.iterrows():
-    clean_addr = clean_address(row["address"])
-    query = f"{row['restaurant_name']} {clean_addr}"
-
-    result = get_store_info(query)
-    if result:
-        df.at[idx, "cleaned_address"] = clean_addr
-        df.at[idx, "api_title"] = result.get("title", "")
-        df.at[idx, "api_link"] = result.get("link", "")
-
-        # ✅ 카테고리 분리
-        raw_category = result.get("category", "")
-        if ">" in raw_category:
-            parts = [p.strip() for p in raw_category.split(">")]
-            df.at[idx, "category"] = parts[0]  # 대분류
-            df.at[idx, "menu"] = parts[-1]     # 소분류
-        else:
-            df.at[idx, "category"] = raw_category
-            df.at[idx, "menu"] = ""
+# ✅ 검색어 생성
+clean_addrs = df["address"].map(clean_address).tolist()
+queries = [f"{name} {addr}" for name, addr in zip(df["restaurant_name"], clean_addrs)]
+
+# ✅ 체크포인트 로드 (이전 실행에서 처리된 행은 건너뜀)
+checkpoint = Checkpoint() if CHECKPOINT_DIR else None
+done = {}
+if checkpoint:
+    if RESUME:
+        done = checkpoint.load()
+    else:
+        checkpoint.clear()
+
+# ✅ 캐시 조회 → 체크포인트/캐시에 없는 검색어만 API 호출
+cache = ResponseCache() if CACHE_PATH else None
+results = [None] * len(queries)
+pending = []
+resumed = 0
+for i, query in enumerate(queries):
+    rec = done.get(i)
+    if rec is not None and rec["query"] == query:  # 입력이 바뀐 행은 다시 조회
+        results[i] = rec["item"]
+        resumed += 1
+        continue
+    hit, item = cache.get(query) if cache else (False, None)
+    if hit:
+        results[i] = item
+    else:
+        pending.append(i)
+if resumed:
+    print(f"♻️ 체크포인트에서 {resumed}건 복원")
+
+
+# ✅ 중복 검색어 묶기 (체인점, 건물명/층수만 다른 주소 등)
+pending_queries, groups = plan_queries(queries, pending)
+saved = len(pending) - len(pending_queries)
+dedup_ratio = saved / len(pending) * 100 if pending else 0.0
+print(f"🧮 호출 계획: 대상 {len(pending)}행 → 고유 검색어 {len(pending_queries)}건 "
+      f"(절감 {saved}건, {dedup_ratio:.1f}%)")
+
+
+fetched_ok = set()
 
-        df.at[idx, "api_description"] = result.get("description", "")
-        df.at[idx, "api_telephone"] = result.get("telephone", "")
-        df.at[idx, "api_address"] = result.get("address", "")
-        df.at[idx, "api_roadAddress"] = result.get("roadAddress", "")
-        df.at[idx, "api_mapx"] = result.get("mapx", "")
-        df.at[idx, "api_mapy"] = result.get("mapy", "")
 
-    time.sleep(0.2)  # rate-limit 고려
+def on_result(j, item):
+    fetched_ok.add(j)
+    if checkpoint:
+        for i in groups[j]:
+            checkpoint.add(i, queries[i], item)
+
+
+# ✅ API 호출 (중단되어도 처리된 청크는 체크포인트에 남음)
+start = time.time()
+controller = AdaptiveConcurrency()
+try:
+    if USE_ASYNC:
+        fetched = run_async(fetch_all_async(pending_queries, cache=cache, on_result=on_result,
+                                            controller=controller))
+    else:
+        fetched = fetch_all_sync(pending_queries, cache=cache, on_result=on_result)
+finally:
+    if checkpoint:
+        checkpoint.flush()
+for members, items in zip(groups, fetched):
+    for i in members:  # 같은 검색어의 모든 행에 결과 반영
+        results[i] = items
+print(f"⏱️ API 호출 완료: {len(pending_queries)}건, {time.time() - start:.1f}초")
+if USE_ASYNC:
+    print(f"🎚️ {controller.stats()}")
+print(f"🔑 키별 당일 사용량: {key_pool.stats()}")
+if cache:
+    print(f"🗄️ {cache.stats()}")
+    cache.close()
+
+# ✅ 후보 점수 계산 → 행별 최적 후보 선택
+best, df["api_confidence"], df["api_distance_m"] = select_best_candidates(df, results)
+# 매칭 없음(no_match) 행은 신뢰도가 NaN이므로 함께 집계
+low_conf = int(((df["api_confidence"] < LOW_CONFIDENCE) | df["api_confidence"].isna()).sum())
+print(f"🎯 신뢰도 {LOW_CONFIDENCE} 미만 또는 매칭 없음 {low_conf}건 (매칭 검토 대상)")
+
+# ✅ 결과 반영
+assemble_results(df, clean_addrs, best)
+
+# ✅ 조회 상태 (ok: 매칭, no_match: 검색 결과 없음, error: 오류로 미조회 → 재실행 시 다시 호출)
+api_status = ["ok" if r else "no_match" for r in best]
+for j, members in enumerate(groups):
+    if j not in fetched_ok:
+        for i in members:
+            api_status[i] = "error"
+df["api_status"] = api_status
+failed_rows = api_status.count("error")
+if failed_rows:
+    print(f"⚠️ 오류로 조회하지 못한 행 {failed_rows}건 (재실행 시 다시 호출)")
 
 # ✅ 결과 엑셀 저장
 df.to_excel("output.xlsx", index=False, engine="openpyxl")
-print("✅ 결과 저장 완료: output.xlsx")
\ No newline at end of file
+print("✅ 결과 저장 완료: output.xlsx")
+
+# ✅ 모든 행을 조회했으면 체크포인트 삭제 (중단된 실행 복구용, 다음 실행은 캐시 유효기간 기준으로 다시 판단)
+if checkpoint and not failed_rows:
+    checkpoint.clear()
+    print(f"🧹 체크포인트 삭제: {CHECKPOINT_DIR}/")
@@ -11,7 +11,9 @@
 # !pip install selenium==4.25.0 pandas -q
 
 # ===== 2️⃣ 드라이버 및 공통 함수 =====
-import pandas as pd, re, time
+import pandas as pd, re, time, json, os, copy, signal, subprocess
+import multiprocessing as mp
+import requests
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
@@ -19,6 +21,7 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 
 chrome_service = Service('/usr/local/bin/chromedriver')
 chrome_options = Options()
@@ -28,25 +31,161 @@ chrome_options.add_argument('--no-sandbox')
 chrome_options.add_argument('--disable-dev-shm-usage')
 chrome_options.add_argument('--window-size=1920,1080')
 
-driver = webdriver.Chrome(service=chrome_service, options=chrome_options)
-wait = WebDriverWait(driver, 15)
-print("✅ ChromeDriver 실행 완료")
+# HTTP 검색이 실패한 경우에만 브라우저를 띄움
+driver = None
+wait = None
 
+# 경량 브라우저 프로필: place id는 URL에서만 읽으므로 이미지·폰트·지도 타일·로그 요청 차단
+LEAN_PROFILE = True
+LEAN_CACHE_DIR = os.path.abspath("chrome_lean_cache")  # 워커별 하위 폴더로 실행 간 재사용
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.m3u8",
+    "*map.pstatic.net/*", "*.map.naver.net/*",                         # 지도 타일
+    "*phinf.pstatic.net/*", "*search.pstatic.net/*",                   # 사진 CDN
+    "*wcs.naver.net/*", "*lcs.naver.com/*", "*nlog.naver.com/*",       # 네이버 로그 수집
+    "*veta.naver.com/*",                                               # 광고
+    "*google-analytics.com/*", "*googletagmanager.com/*", "*doubleclick.net/*",
+]
+worker_id = 0  # 워커 프로세스에서 설정 (캐시 폴더 분리용)
+driver_pid_hook = None  # 워커 프로세스에서 설정: chromedriver pid가 바뀔 때마다 부모에게 알림
 
-def switch_left():
-    """왼쪽 검색결과 iframe 전환"""
-    driver.switch_to.default_content()
-    wait.until(EC.frame_to_be_available_and_switch_to_it((By.ID, "searchIframe")))
+def lean_options(base, cache_dir):
+    """기본 옵션 복사본에 이미지/미디어/폰트 차단 설정과 디스크 캐시 폴더 추가"""
+    options = copy.deepcopy(base)
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+        "profile.default_content_setting_values.media_stream": 2,
+    })
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--autoplay-policy=user-gesture-required")
+    options.add_argument("--disable-remote-fonts")
+    options.add_argument(f"--disk-cache-dir={cache_dir}")
+    options.add_argument("--disk-cache-size=268435456")
+    return options
 
-def switch_right():
-    """오른쪽 상세정보 iframe 전환"""
-    driver.switch_to.default_content()
-    wait.until(EC.frame_to_be_available_and_switch_to_it((By.ID, "entryIframe")))
+def ensure_driver():
+    global driver, wait
+    if driver is None:
+        if LEAN_PROFILE:
+            options = lean_options(chrome_options, os.path.join(LEAN_CACHE_DIR, f"w{worker_id}"))
+            driver = webdriver.Chrome(service=chrome_service, options=options)
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+        else:
+            driver = webdriver.Chrome(service=chrome_service, options=chrome_options)
+        driver.set_page_load_timeout(30)  # 멈춘 페이지는 예외로 처리
+        wait = WebDriverWait(driver, 15)
+        print("✅ ChromeDriver 실행 완료")
+        notify_driver_pid()
+
+# 병렬 실행 설정
+WORKERS = 4         # 브라우저 워커 프로세스 수 (1이면 단일 프로세스로 순차 실행)
+ROW_TIMEOUT = 90    # 한 행 처리 제한 시간(초), 초과 시 워커 프로세스 교체
+
+# 페이지 준비 대기 (고정 sleep 대신 조건 충족 즉시 진행)
+PAGE_DEADLINE = 10  # 검색 1건당 전체 대기 상한(초)
+POLL_INTERVAL = 0.1
+LIST_XPATH = '//*[@id="_pcmap_list_scroll_container"]/ul/li'
+
+# HTTP 검색 설정 (로컬 fixture 서버 테스트 시 PLACE_SEARCH_URL 교체)
+PLACE_SEARCH_URL = "https://map.naver.com/p/api/search/allSearch"
+HTTP_DELAY = 0.3
+http = requests.Session()
+http.headers.update({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Referer": "https://map.naver.com/",
+    "Accept-Language": "ko-KR,ko;q=0.9",
+})
 
 
 # ===== 3️⃣ Place ID 크롤러 =====
+def build_query(name, sig, emd):
+    return name if ("점" in name and "반점" not in name) else f"{name} {sig} {emd}"
+
+
+def parse_place_id(text):
+    """검색 응답(JSON 또는 HTML)에서 첫 번째 place id 추출"""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        places = ((data.get("result") or {}).get("place") or {}).get("list") or []
+        if places and str(places[0].get("id", "")).isdigit():
+            return str(places[0]["id"])
+        return None
+    if m := re.search(r'place/(\d+)|PlaceSummary:(\d+)', text):
+        return m.group(1) or m.group(2)
+    return None
+
+
+def resolve_place_id_http(query):
+    """브라우저 없이 지도 검색 API로 place id 조회 (실패 시 None)"""
+    try:
+        response = http.get(PLACE_SEARCH_URL, params={"query": query, "type": "all", "page": 1}, timeout=10)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"⚠️ HTTP 검색 실패: {e}")
+        return None
+    finally:
+        time.sleep(HTTP_DELAY)
+    return parse_place_id(response.text)
+
+
+def resolve_place_id(name, sig, emd):
+    """HTTP 검색 우선, 실패 시 Selenium 크롤링"""
+    started = time.time()
+    query = build_query(name, sig, emd)
+    place_id = resolve_place_id_http(query)
+    if place_id:
+        print(f"✅ 완료(HTTP): {name} (placeId={place_id})")
+        result = {"restaurant_name": name, "sig_kor_nm": sig, "emd_kor_nm": emd,
+                  "place_id": place_id, "resolver": "http"}
+    else:
+        result = crawl_place_id(name, sig, emd)
+        result["resolver"] = "selenium"
+    result["elapsed_s"] = round(time.time() - started, 2)  # 행별 조회 소요 시간
+    return result
+
+
+def place_id_from_url():
+    match = re.search(r"place/(\d+)", driver.current_url)
+    return match.group(1) if match else None
+
+
+def wait_until(condition, deadline):
+    """deadline(절대 시각)까지 condition이 참이 되면 즉시 그 값을 반환, 시간 초과 시 None"""
+    try:
+        return WebDriverWait(driver, max(deadline - time.time(), POLL_INTERVAL),
+                             poll_frequency=POLL_INTERVAL,
+                             ignored_exceptions=(WebDriverException,)).until(condition)
+    except TimeoutException:
+        return None
+
+
+def search_ready(d):
+    """URL에 place id 표시 / 상세 iframe 등장 / 검색결과 목록 로드 중 먼저 오는 상태"""
+    if place_id_from_url():
+        return "url"
+    d.switch_to.default_content()
+    if d.find_elements(By.ID, "entryIframe"):
+        return "entry"
+    frames = d.find_elements(By.ID, "searchIframe")
+    if frames:
+        d.switch_to.frame(frames[0])
+        if d.find_elements(By.XPATH, LIST_XPATH):
+            return "list"
+        d.switch_to.default_content()
+    return False
+
+
 def crawl_place_id(name, sig, emd):
-    query = name if ("점" in name and "반점" not in name) else f"{name} {sig} {emd}"
+    ensure_driver()
+    query = build_query(name, sig, emd)
     print(f"🔍 검색 중: {query}")
 
     result = {
@@ -57,24 +196,19 @@ def crawl_place_id(name, sig, emd):
     }
 
     try:
+        deadline = time.time() + PAGE_DEADLINE
         driver.get("https://map.naver.com/v5/search/" + query)
-        time.sleep(2)
+        state = wait_until(search_ready, deadline)
 
         # ✅ CASE 1: 검색 결과 리스트 존재 시 첫 항목 클릭
-        try:
-            switch_left()
-            items = driver.find_elements(By.XPATH, '//*[@id="_pcmap_list_scroll_container"]/ul/li')
-            if items:
-                items[0].find_element(By.TAG_NAME, "a").send_keys(Keys.ENTER)
-                switch_right()
-        except:
-            # ✅ CASE 2: 바로 상세 페이지 진입
-            switch_right()
-
-        # 🔹 URL에서 place_id 추출
-        current_url = driver.current_url
-        if m := re.search(r'place/(\d+)', current_url):
-            result["place_id"] = m.group(1)
+        if state == "list":
+            items = driver.find_elements(By.XPATH, LIST_XPATH)
+            items[0].find_element(By.TAG_NAME, "a").send_keys(Keys.ENTER)
+
+        # ✅ CASE 2: 바로 상세 페이지 진입 → URL에 place id가 붙을 때까지만 대기
+        if state:
+            driver.switch_to.default_content()
+            result["place_id"] = wait_until(lambda d: place_id_from_url(), deadline)
 
         print(f"✅ 완료: {name} (placeId={result['place_id']})")
 
@@ -84,17 +218,218 @@ def crawl_place_id(name, sig, emd):
     return result
 
 
+def restart_driver():
+    """드라이버 종료 (다음 조회 때 새로 실행)"""
+    global driver, wait
+    if driver is not None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    driver, wait = None, None
+    notify_driver_pid()
+
+
+def notify_driver_pid():
+    if driver_pid_hook:
+        process = getattr(driver.service, "process", None) if driver is not None else None
+        driver_pid_hook(process.pid if process else None)
+
+
+def kill_process_tree(pid):
+    """chromedriver와 그 하위 Chrome 프로세스까지 강제 종료 (워커만 죽이면 브라우저가 고아로 남음)"""
+    if not pid:
+        return
+    tree, stack = [], [pid]
+    while stack:  # 부모를 먼저 죽이면 자식이 init으로 옮겨가므로 트리 전체를 먼저 수집
+        p = stack.pop()
+        tree.append(p)
+        out = subprocess.run(["pgrep", "-P", str(p)], capture_output=True, text=True).stdout
+        stack.extend(int(c) for c in out.split())
+    for p in tree:
+        try:
+            os.kill(p, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def driver_alive():
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def failed_result(name, sig, emd, reason):
+    return {"restaurant_name": name, "sig_kor_nm": sig, "emd_kor_nm": emd,
+            "place_id": None, "resolver": reason, "elapsed_s": None}
+
+
+def worker_main(wid, task_q, result_q):
+    """워커 프로세스: 자체 드라이버로 큐에서 행을 하나씩 꺼내 처리"""
+    global worker_id, driver_pid_hook
+    worker_id = wid
+    driver_pid_hook = lambda pid: result_q.put(("driver", wid, None, pid))
+    while True:
+        task = task_q.get()
+        if task is None:
+            break
+        pos, name, sig, emd = task
+        result_q.put(("start", wid, pos, None))
+        try:
+            res = resolve_place_id(name, sig, emd)
+        except Exception as e:
+            print(f"⚠️ [워커 {wid}] 예외 발생: {e}")
+            res = failed_result(name, sig, emd, "error")
+        if driver is not None and not driver_alive():
+            print(f"♻️ [워커 {wid}] 드라이버 재시작")
+            restart_driver()
+        result_q.put(("done", wid, pos, res))
+    restart_driver()
+
+
+def run_worker_pool(tasks, workers=WORKERS, row_timeout=ROW_TIMEOUT, on_result=None):
+    """tasks: [(pos, name, sig, emd), ...] → tasks 순서대로 결과 리스트 (on_result: 완료 즉시 호출)"""
+    # 결과 큐는 SimpleQueue: put이 즉시 파이프에 기록되어 워커가 죽어도 보낸 결과는 유실되지 않음
+    task_q, result_q = mp.Queue(), mp.SimpleQueue()
+    for task in tasks:
+        task_q.put(task)
+    for _ in range(workers):
+        task_q.put(None)  # 워커별 종료 신호
+
+    def spawn(wid):
+        p = mp.Process(target=worker_main, args=(wid, task_q, result_q), daemon=True)
+        p.start()
+        return p
+
+    by_pos = {task[0]: task for task in tasks}
+    procs = {wid: spawn(wid) for wid in range(workers)}
+    in_flight = {}  # wid -> (pos, 시작 시각)
+    driver_pids = {}  # wid -> chromedriver pid (워커 교체 시 브라우저까지 종료)
+    results = {}
+
+    while len(results) < len(tasks):
+        # 종료 여부를 먼저 확인한 뒤 큐를 비워야, 죽기 직전에 보낸 메시지까지 반영됨
+        exitcodes = {wid: p.exitcode for wid, p in procs.items() if not p.is_alive()}
+        while not result_q.empty():
+            kind, wid, pos, res = result_q.get()
+            if kind == "driver":
+                driver_pids[wid] = res
+            elif kind == "start":
+                in_flight[wid] = (pos, time.time())
+            else:
+                results[pos] = res
+                in_flight.pop(wid, None)
+                if on_result:
+                    on_result(res)
+        if len(exitcodes) == len(procs) and not in_flight:
+            break
+
+        # 멈춘 워커(hung tab)나 비정상 종료된 워커는 교체, 처리 중이던 행은 실패로 기록
+        for wid, p in list(procs.items()):
+            job = in_flight.get(wid)
+            hung = job is not None and time.time() - job[1] > row_timeout
+            crashed = exitcodes.get(wid, 0) != 0
+            if not (hung or crashed):
+                continue
+            if p.is_alive():
+                p.kill()
+            p.join()
+            kill_process_tree(driver_pids.pop(wid, None))  # 같은 캐시 폴더를 쓸 새 워커와 겹치지 않도록
+            if job is not None:
+                _, name, sig, emd = by_pos[job[0]]
+                results[job[0]] = failed_result(name, sig, emd, "timeout" if hung else "crashed")
+                in_flight.pop(wid)
+                if on_result:
+                    on_result(results[job[0]])
+            print(f"♻️ 워커 {wid} 교체 ({'시간 초과' if hung else '비정상 종료'})")
+            procs[wid] = spawn(wid)
+        time.sleep(0.2)
+
+    for p in procs.values():
+        p.join(timeout=30)
+    return [results.get(pos) or failed_result(name, sig, emd, "crashed") for pos, name, sig, emd in tasks]
+
+
+# 증분 실행: 이전 결과에서 place_id가 확인된 행은 건너뛰고, 새 결과는 한 행씩 바로 추가 기록
+INCREMENTAL = True
+KEY_COLS = ["restaurant_name", "sig_kor_nm", "emd_kor_nm"]
+RESULT_COLS = KEY_COLS + ["place_id", "resolver", "elapsed_s"]
+
+
+def row_key(name, sig, emd):
+    return tuple("" if pd.isna(v) else str(v) for v in (name, sig, emd))
+
+
+def load_previous(path):
+    """이전 결과 파일 → {키: 마지막 결과 행}; 예전 컬럼 구성이면 현재 형식으로 다시 저장"""
+    if not os.path.exists(path):
+        return {}
+    prev = pd.read_csv(path, dtype={"place_id": str}, encoding="utf-8-sig", on_bad_lines="skip")
+    if list(prev.columns) != RESULT_COLS:
+        prev = prev.reindex(columns=RESULT_COLS)
+        prev.to_csv(path, index=False, encoding="utf-8-sig")
+    prev = prev.astype(object).where(prev.notna(), None)
+    return {row_key(*rec[:3]): dict(zip(RESULT_COLS, rec)) for rec in prev.itertuples(index=False)}
+
+
+def append_result(path, res):
+    """결과 한 행을 즉시 추가 기록 (중단되어도 처리된 행은 보존)"""
+    with open(path, "a", encoding="utf-8-sig", newline="") as f:
+        pd.DataFrame([res], columns=RESULT_COLS).to_csv(f, header=f.tell() == 0, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def finalize_output(path, df, latest):
+    """입력 행 순서대로 최신 결과를 모아 파일을 한 번에 정리 (추가 기록으로 생긴 중복 제거)"""
+    rows = [latest.get(row_key(*k)) or failed_result(*k, "missing")
+            for k in zip(df["restaurant_name"], df["sig_kor_nm"], df["emd_kor_nm"])]
+    tmp_path = path + ".tmp"
+    pd.DataFrame(rows, columns=RESULT_COLS).to_csv(tmp_path, index=False, encoding="utf-8-sig")
+    os.replace(tmp_path, path)
+
+
 # ===== 4️⃣ 실행 및 저장 =====
-df = pd.read_csv("good_restaurant_temp.csv", encoding="utf-8")
-print(f"📄 총 {len(df)}개 데이터 로드 완료")
+if __name__ == "__main__":
+    df = pd.read_csv("good_restaurant_temp.csv", encoding="utf-8")
+    print(f"📄 총 {len(df)}개 데이터 로드 완료")
+
+    output_path = "good_restaurant_placeid.csv"
+    latest = load_previous(output_path) if INCREMENTAL else {}
+    if not INCREMENTAL and os.path.exists(output_path):
+        os.remove(output_path)
+
+    # 이전에 place_id를 찾은 키는 건너뛰고, 새 행·실패 행만 (중복 키는 한 번만) 조회
+    rows = list(zip(df["restaurant_name"], df["sig_kor_nm"], df["emd_kor_nm"]))
+    pending = {}
+    for name, sig, emd in rows:
+        key = row_key(name, sig, emd)
+        if not (latest.get(key) or {}).get("place_id"):
+            pending.setdefault(key, (name, sig, emd))
+    reused = sum(row_key(*r) not in pending for r in rows)
+    print(f"♻️ 이전 결과 재사용 {reused}행, 조회 대상 {len(pending)}건")
+
+    def on_result(res):
+        append_result(output_path, res)
+        latest[row_key(res["restaurant_name"], res["sig_kor_nm"], res["emd_kor_nm"])] = res
 
-results = []
-for i, row in df.iterrows():
-    res = crawl_place_id(row["restaurant_name"], row["sig_kor_nm"], row["emd_kor_nm"])
-    results.append(res)
+    tasks = [(pos, *args) for pos, args in enumerate(pending.values())]
+    if WORKERS > 1 and len(tasks) > 1:
+        results = run_worker_pool(tasks, min(WORKERS, len(tasks)), on_result=on_result)
+    else:
+        results = []
+        for _, name, sig, emd in tasks:
+            results.append(resolve_place_id(name, sig, emd))
+            on_result(results[-1])
 
-output = pd.DataFrame(results)
-output.to_csv("good_restaurant_placeid.csv", index=False, encoding="utf-8-sig")
-print("🎉 크롤링 완료 → good_restaurant_placeid.csv 저장 완료")
+    if results:
+        output = pd.DataFrame(results)
+        print(f"📊 조회 경로: {output['resolver'].value_counts().to_dict()}")
+        print("⏱️ 행별 소요 시간(초):")
+        print(output.groupby("resolver")["elapsed_s"].describe(percentiles=[0.5, 0.9, 0.99]).round(2))
+    finalize_output(output_path, df, latest)
+    print(f"🎉 크롤링 완료 → {output_path} 저장 완료")
 
-driver.quit()
+    restart_driver()
@@ -1,9 +1,19 @@
 # ===== 환경 세팅 (Windows 전용) =====
 # pip install selenium webdriver-manager pandas
 
+import os
 import re
+import json
+import glob
+import base64
+import gzip
 import time
 import random
+import heapq
+import sqlite3
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Tuple, Optional
 
 import pandas as pd
@@ -12,12 +22,55 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
 
+try:
+    import psutil  # 브라우저 메모리(RSS) 확인용, 없으면 페이지 수 기준으로만 재시작
+except ImportError:
+    psutil = None
+
+
+# ========= 공통: 경량 브라우저 프로필 =========
+# URL과 텍스트 노드만 읽으므로 이미지·미디어·폰트·지도 타일·로그 수집 요청은 받지 않음
+LEAN_PROFILE = True                                     # build_driver 기본값
+LEAN_CACHE_DIR = os.path.abspath("chrome_lean_cache")   # 실행 간 재사용하는 디스크 캐시
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.m3u8",
+    "*map.pstatic.net/*", "*.map.naver.net/*",                         # 지도 타일
+    "*phinf.pstatic.net/*", "*search.pstatic.net/*",                   # 사진 CDN
+    "*wcs.naver.net/*", "*lcs.naver.com/*", "*nlog.naver.com/*",       # 네이버 로그 수집
+    "*veta.naver.com/*",                                               # 광고
+    "*google-analytics.com/*", "*googletagmanager.com/*", "*doubleclick.net/*",
+]
+
+
+def apply_lean_options(chrome_options: Options, cache_dir: str = LEAN_CACHE_DIR) -> None:
+    """Chrome 설정으로 이미지/미디어/폰트 차단 + 디스크 캐시 디렉터리 고정"""
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+        "profile.default_content_setting_values.media_stream": 2,
+    })
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+    chrome_options.add_argument("--disable-remote-fonts")
+    chrome_options.add_argument(f"--disk-cache-dir={cache_dir}")
+    chrome_options.add_argument("--disk-cache-size=268435456")
+
+
+def enable_lean_network(driver: webdriver.Chrome) -> None:
+    """CDP로 차단 URL 패턴 등록 (설정으로 못 막는 지도 타일·추적 스크립트까지)"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+
 
 # ========= 공통: Selenium 드라이버 =========
-def build_driver(headless: bool = True) -> Tuple[webdriver.Chrome, WebDriverWait]:
+def build_driver(headless: bool = True, lean: bool = LEAN_PROFILE, perf_log: bool = False,
+                 cache_dir: str = LEAN_CACHE_DIR) -> Tuple[webdriver.Chrome, WebDriverWait]:
     chrome_options = Options()
 
     if headless:
@@ -32,9 +85,15 @@ def build_driver(headless: bool = True) -> Tuple[webdriver.Chrome, WebDriverWait
         "AppleWebKit/537.36 (KHTML, like Gecko) "
         "Chrome/120.0.0.0 Safari/537.36"
     )
+    if lean:
+        apply_lean_options(chrome_options, cache_dir)
+    if perf_log:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
 
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=chrome_options)
+    if lean:
+        enable_lean_network(driver)
     wait = WebDriverWait(driver, 15)
 
     return driver, wait
@@ -58,32 +117,148 @@ def extract_price_num(price_str: str) -> Optional[int]:
     return int(m.group(1).replace(",", ""))
 
 
+# ========= 요청 간격 조절 (호스트별 예산 + 응답 상태에 따른 적응) =========
+# 고정 human_sleep 휴식 대신: 응답이 정상이면 간격을 줄이고, 차단·캡차·느린 로딩이면 늘림
+# 여러 워커가 같은 상태를 보도록 crawl_naver_menu가 multiprocessing.Manager로 공유
+HOST_BUDGET = 40          # 호스트별 BUDGET_WINDOW_S 동안 허용 요청 수 (전체 워커 합산)
+BUDGET_WINDOW_S = 60
+PACE_START = 1.0          # 호스트별 요청 간 시작 간격(초)
+PACE_MIN = 0.3
+PACE_MAX = 30.0
+PACE_SPEEDUP = 0.9        # 정상 응답마다 간격 × 0.9
+PACE_SLOWDOWN = 1.5       # 느린 로딩(SLOW_LOAD_S 초과)·timeout 시 간격 × 1.5
+PACE_BLOCK_FACTOR = 4.0   # 차단/캡차 시 간격 × 4, BLOCK_COOLDOWN 동안 해당 호스트 요청 정지
+BLOCK_COOLDOWN = 60
+SLOW_LOAD_S = 12          # place 1곳 처리(이동+대기+추출)가 이보다 오래 걸리면 느린 응답
+PACE_METRICS = "naver_menu_pace.json"  # 호스트별 실효 요청 속도 기록 (None이면 저장 안 함)
+PLACE_HOST = "pcmap.place.naver.com"
+
+
+class PoliteScheduler:
+    """호스트별 요청 예산 + 적응형 요청 간격. state/lock이 Manager 객체면 프로세스 간 공유
+    waited: 이 프로세스가 acquire에서 대기한 누적 시간(초) — 응답 시간 측정에서 빼기 위함"""
+    def __init__(self, state=None, lock=None, budget: int = HOST_BUDGET, window_s: float = BUDGET_WINDOW_S):
+        self.state = {} if state is None else state
+        self.lock = threading.Lock() if lock is None else lock
+        self.budget, self.window_s = budget, window_s
+        self.waited = 0.0
+
+    def _host(self, host: str) -> Dict:
+        st = self.state.get(host)
+        if st is None:
+            st = {"interval": PACE_START, "next_at": 0.0, "recent": [], "first_at": None,
+                  "requests": 0, "ok": 0, "slow": 0, "blocked": 0}
+        return st
+
+    def acquire(self, host: str) -> float:
+        """host에 요청해도 될 때까지 대기 (간격·예산·차단 후 정지 모두 반영), 대기한 시간(초) 반환"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                st = self._host(host)
+                now = time.time()
+                recent = [t for t in st["recent"] if now - t < self.window_s]
+                wait_s = st["next_at"] - now
+                if len(recent) >= self.budget:
+                    wait_s = max(wait_s, recent[0] + self.window_s - now)
+                if wait_s <= 0:
+                    recent.append(now)
+                    st.update(recent=recent, requests=st["requests"] + 1, first_at=st["first_at"] or now,
+                              next_at=now + st["interval"] * random.uniform(0.8, 1.2))
+                    self.state[host] = st  # Manager dict는 다시 넣어야 다른 프로세스에 반영됨
+                    return waited
+            nap = min(wait_s, 1.0)
+            time.sleep(nap)
+            waited += nap
+            self.waited += nap
+
+    def report(self, host: str, outcome: str) -> None:
+        """요청 결과 반영: "ok"면 간격 축소, "slow"/"blocked"면 확대"""
+        with self.lock:
+            st = self._host(host)
+            if outcome == "blocked":
+                st["interval"] = min(PACE_MAX, st["interval"] * PACE_BLOCK_FACTOR)
+                st["next_at"] = max(st["next_at"], time.time() + BLOCK_COOLDOWN)
+            elif outcome == "slow":
+                st["interval"] = min(PACE_MAX, st["interval"] * PACE_SLOWDOWN)
+            else:
+                outcome = "ok"
+                st["interval"] = max(PACE_MIN, st["interval"] * PACE_SPEEDUP)
+            st[outcome] += 1
+            self.state[host] = st
+
+    def metrics(self) -> Dict[str, Dict]:
+        """호스트별 실효 요청 속도(최근 창 기준 / 전체 평균, 분당)와 현재 간격·결과 집계"""
+        with self.lock:
+            hosts = dict(self.state.items())
+        now = time.time()
+        out = {}
+        for host, st in hosts.items():
+            recent = [t for t in st["recent"] if now - t < self.window_s]
+            span = now - st["first_at"] if st["first_at"] else 0.0
+            out[host] = {
+                "rate_per_min": round(len(recent) * 60 / self.window_s, 1),
+                "avg_rate_per_min": round(st["requests"] * 60 / max(span, self.window_s), 1),
+                "interval_s": round(st["interval"], 2),
+                **{k: st[k] for k in ("requests", "ok", "slow", "blocked")},
+            }
+        return out
+
+
+pacer = PoliteScheduler()  # 워커 프로세스에서는 crawl_shard가 공유 상태로 교체
+
+
+def pace_outcome(code: str, load_s: float, slow_s: float = SLOW_LOAD_S) -> str:
+    """place 결과 코드·처리 시간(스케줄러 대기 제외) → 스케줄러에 알릴 응답 상태"""
+    if code == "blocked":
+        return "blocked"
+    if code == "timeout" or load_s > slow_s:
+        return "slow"
+    return "ok"
+
+
+def report_pace(metrics: Dict[str, Dict], path: Optional[str] = PACE_METRICS) -> None:
+    """호스트별 실효 요청 속도 출력 + JSON 기록"""
+    if not metrics:
+        return
+    print("📊 요청 속도 (분당, 최근 창 / 전체 평균)")
+    for host, m in metrics.items():
+        print(f"  {host}: {m['rate_per_min']} / {m['avg_rate_per_min']}회, 간격 {m['interval_s']}초, "
+              f"요청 {m['requests']} (정상 {m['ok']}, 느림 {m['slow']}, 차단 {m['blocked']})")
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": time.time(), "hosts": metrics}, f, ensure_ascii=False, indent=2)
+
+
 # ========= 페이지 이동 및 메뉴 탐색 =========
-def open_place_and_go_menu(driver: webdriver.Chrome, wait: WebDriverWait, place_id: str) -> Dict:
-    info = {"loaded": False, "menu_text_available": False, "image_menu_only": False, "error": None}
+def open_place_via_home(driver: webdriver.Chrome, wait: WebDriverWait, place_id: str) -> Dict:
+    info = {"loaded": False, "menu_text_available": False, "image_menu_only": False, "error": None, "path": "home"}
 
     home_url = f"https://pcmap.place.naver.com/restaurant/{place_id}/home"
+    pacer.acquire(PLACE_HOST)
     driver.get(home_url)
 
     try:
         wait.until(EC.presence_of_element_located((By.ID, "app-root")))
         info["loaded"] = True
     except Exception as e:
-        info["error"] = f"home load fail: {e}"
+        info["error"] = f"home load fail: {type(e).__name__} {e}"
         return info
 
-    human_sleep()
-
     opened_menu = False
 
     try:
-        candidates = driver.find_elements(
-            By.XPATH,
-            "//a[(contains(., '메뉴') and (@role='tab' or contains(@href, '/menu')))] | //button[contains(., '메뉴')]"
-        )
+        # app-root 이후 탭이 렌더링될 때까지 대기 (고정 sleep 대신, 탭이 없으면 스크롤 루트로)
+        try:
+            candidates = WebDriverWait(driver, MENU_READY_TIMEOUT, poll_frequency=0.2).until(
+                EC.presence_of_all_elements_located((By.XPATH, MENU_TAB_XPATH))
+            )
+        except TimeoutException:
+            candidates = []
         if candidates:
             candidates[0].click()
             opened_menu = True
+            info["path"] = "tab"
             human_sleep(0.8, 1.6)
     except Exception:
         pass
@@ -96,6 +271,7 @@ def open_place_and_go_menu(driver: webdriver.Chrome, wait: WebDriverWait, place_
                 header = driver.find_elements(By.XPATH, "//h2[contains(normalize-space(.), '메뉴')]")
                 if header:
                     opened_menu = True
+                    info["path"] = "scroll"
                     break
         except Exception:
             pass
@@ -127,19 +303,71 @@ def open_place_and_go_menu(driver: webdriver.Chrome, wait: WebDriverWait, place_
 
 
 # ========= 메뉴 파싱 =========
-def parse_menu_items(driver: webdriver.Chrome) -> List[Tuple[str, Optional[str]]]:
-    results = []
+# 메뉴 서브 라우트로 바로 진입 (실패 시에만 홈 → 탭/스크롤 탐색)
+MENU_FAST_PATH = True
+MENU_READY_TIMEOUT = 6  # 메뉴 목록(또는 메뉴판 이미지 버튼) 등장 대기 상한(초)
+MENU_TAB_XPATH = (
+    "//a[(contains(., '메뉴') and (@role='tab' or contains(@href, '/menu')))] | "
+    "//button[contains(., '메뉴')]"
+)  # 메뉴 탭/앵커
+IMAGE_MENU_XPATH = "//*[contains(., '메뉴판 이미지로 보기')][self::a or self::button or self::span]"
+
+
+def open_menu_direct(driver: webdriver.Chrome, place_id: str) -> Optional[Dict]:
+    """/menu/list 라우트로 바로 이동해 메뉴 컨테이너가 뜨면 info 반환, 아니면 None"""
+    pacer.acquire(PLACE_HOST)
+    driver.get(f"https://pcmap.place.naver.com/restaurant/{place_id}/menu/list")
+    try:
+        WebDriverWait(driver, MENU_READY_TIMEOUT, poll_frequency=0.2).until(
+            lambda d: d.find_elements(By.XPATH, MENU_LI_XPATH) or d.find_elements(By.XPATH, IMAGE_MENU_XPATH)
+        )
+    except TimeoutException:
+        return None
+    has_items = bool(driver.find_elements(By.XPATH, MENU_LI_XPATH))
+    return {"loaded": True, "menu_text_available": has_items, "image_menu_only": not has_items,
+            "error": None, "path": "direct"}
 
-    items = driver.find_elements(
-        By.XPATH,
-        "//div[contains(@class,'place_section_content')]//li"
-    )
 
-    if not items:
-        return []
+def open_place_and_go_menu(driver: webdriver.Chrome, wait: WebDriverWait, place_id: str) -> Dict:
+    """메뉴 라우트 직행 → 실패 시 홈 경유. info에 사용 경로(path)와 소요 시간(elapsed_s) 추가(페이싱 대기 제외)"""
+    waited, started = pacer.waited, time.time()
+    info = open_menu_direct(driver, place_id) if MENU_FAST_PATH else None
+    if info is None:
+        info = open_place_via_home(driver, wait, place_id)
+    info["elapsed_s"] = time.time() - started - (pacer.waited - waited)
+    return info
+
+
+MENU_LI_XPATH = "//div[contains(@class,'place_section_content')]//li"
+
+# 한 번의 execute_script로 메뉴 li 텍스트를 모두 가져옴
+# (화면에 보이지 않는 요소는 WebElement.text와 같게 빈 문자열)
+MENU_TEXT_JS = """
+const snap = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+const texts = [];
+for (let i = 0; i < snap.snapshotLength; i++) {
+  const el = snap.snapshotItem(i);
+  texts.push(el.getClientRects().length ? el.innerText : "");
+}
+return texts;
+"""
+
+
+def menu_texts(driver: webdriver.Chrome) -> List[str]:
+    """메뉴 li 텍스트 추출 (WebDriver 왕복 1회)"""
+    return driver.execute_script(MENU_TEXT_JS, MENU_LI_XPATH)
+
+
+def menu_texts_elementwise(driver: webdriver.Chrome) -> List[str]:
+    """(이전 방식) li마다 .text 호출, 벤치마크 비교용"""
+    return [li.text for li in driver.find_elements(By.XPATH, MENU_LI_XPATH)]
 
-    for li in items:
-        raw = clean_text(li.text)
+
+def parse_menu_texts(texts: List[str]) -> List[Tuple[str, Optional[str]]]:
+    results = []
+
+    for text in texts:
+        raw = clean_text(text)
         if not raw:
             continue
         lines = [clean_text(x) for x in raw.split("\n") if x.strip()]
@@ -161,93 +389,627 @@ def parse_menu_items(driver: webdriver.Chrome) -> List[Tuple[str, Optional[str]]
     return results
 
 
-# ========= 전체 크롤링 =========
-def crawl_naver_menu(place_ids: List[str], headless: bool = True) -> pd.DataFrame:
-    driver, wait = build_driver(headless=headless)
+def parse_menu_items(driver: webdriver.Chrome) -> List[Tuple[str, Optional[str]]]:
+    return parse_menu_texts(menu_texts(driver))
+
+
+# ========= 오프라인 스냅샷 저장 / 재파싱 =========
+# 메뉴 페이지 HTML을 gzip으로 남겨두면, 파싱 규칙을 고친 뒤 재크롤링 없이 CPU만으로 다시 추출 가능
+SNAPSHOT_DIR = "menu_snapshots"  # None이면 저장 안 함, 구조: {SNAPSHOT_DIR}/{place_id}/{크롤링 시각}.html.gz|.json.gz
+HTML_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "tr", "ul",
+}
+HTML_SKIP_TAGS = {"script", "style", "noscript", "template"}
+SNAPSHOT_SUFFIXES = (".json.gz", ".html.gz")  # 네트워크 응답(JSON) / 페이지 HTML, 같은 시각이면 JSON 우선
+
+
+def save_snapshot(place_id: str, content: str, snapshot_dir: str = SNAPSHOT_DIR, suffix: str = ".html.gz",
+                  stamp: Optional[str] = None) -> str:
+    """stamp: 같은 방문의 JSON/HTML 스냅샷을 같은 이름으로 묶기 위한 크롤링 시각"""
+    folder = os.path.join(snapshot_dir, str(place_id))
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, (stamp or time.strftime("%Y%m%dT%H%M%S")) + suffix)
+    with gzip.open(path + ".tmp", "wt", encoding="utf-8", compresslevel=6) as f:
+        f.write(content)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def html_inner_text(el) -> str:
+    """lxml 요소의 innerText 근사: 블록 요소 경계에 줄바꿈, 인라인 요소는 그대로 이어 붙임
+    (오프라인이라 CSS로 숨겨진 요소는 구분하지 못함)"""
+    parts = []
+
+    def walk(node):
+        tag = node.tag if isinstance(node.tag, str) else None  # 주석/처리 명령은 tail만 사용
+        if tag in HTML_SKIP_TAGS or tag is None:
+            return
+        block = tag in HTML_BLOCK_TAGS
+        if block:
+            parts.append("\n")
+        parts.append(node.text or "")
+        for child in node:
+            walk(child)
+            parts.append(child.tail or "")
+        if block:
+            parts.append("\n")
+
+    walk(el)
+    return "".join(parts)
+
+
+def list_snapshots(snapshot_dir: str = SNAPSHOT_DIR, latest_only: bool = True) -> List[Tuple[str, str, str]]:
+    """[(place_id, 크롤링 시각, 경로), ...] — HTML·JSON 스냅샷을 시각 기준으로 합쳐 나열
+    (같은 시각에 둘 다 있으면 JSON 경로, HTML은 reparse_snapshot이 대체용으로 사용), latest_only면 place별 최신만"""
+    snaps = []
+    for pid in sorted(os.listdir(snapshot_dir)):
+        by_stamp = {}
+        for suffix in reversed(SNAPSHOT_SUFFIXES):  # 나중에 넣는 JSON이 같은 시각의 HTML을 덮어씀
+            for path in glob.glob(os.path.join(snapshot_dir, pid, "*" + suffix)):
+                by_stamp[os.path.basename(path)[:-len(suffix)]] = path
+        stamps = sorted(by_stamp)
+        for stamp in (stamps[-1:] if latest_only else stamps):
+            snaps.append((pid, stamp, by_stamp[stamp]))
+    return snaps
+
+
+def html_menu_texts(html: str) -> List[str]:
+    """저장된 HTML에서 menu_texts와 같은 형태로 li 텍스트 추출"""
+    from lxml import html as lxml_html  # 오프라인 재파싱에만 필요 (pip install lxml)
+    doc = lxml_html.fromstring(html)
+    return [html_inner_text(el) for el in doc.xpath(MENU_LI_XPATH)]
+
+
+def snapshot_menu_items(path: str) -> List[Tuple[str, Optional[str]]]:
+    """스냅샷 1개 → [(menu_name, price_text or None), ...]
+    JSON은 menus_from_payloads로 디코딩, 메뉴가 없으면 같은 시각의 HTML을 텍스트 규칙으로 파싱 (크롤링 때와 같은 순서)"""
+    if path.endswith(".json.gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            items = menus_from_payloads(json.load(f))
+        html_path = path[:-len(".json.gz")] + ".html.gz"
+        if items or not os.path.exists(html_path):
+            return items
+        path = html_path
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        html = f.read()
+    return parse_menu_texts(html_menu_texts(html))
+
+
+def reparse_snapshot(snap: Tuple[str, str, str]) -> List[Dict]:
+    pid, crawled_at, path = snap
+    items = snapshot_menu_items(path)
+    if not items:
+        return [{"place_id": pid, "menu": None, "price": None, "price_num": None,
+                 "currency": "KRW", "note": "텍스트 메뉴 없음", "crawled_at": crawled_at}]
+    return [{"place_id": pid, "menu": name, "price": price,
+             "price_num": extract_price_num(price) if price else None,
+             "currency": "KRW", "note": None, "crawled_at": crawled_at} for name, price in items]
+
+
+def reparse_snapshots(snapshot_dir: str = SNAPSHOT_DIR, workers: Optional[int] = None,
+                      latest_only: bool = True) -> pd.DataFrame:
+    """스냅샷 저장소 전체를 현재 menus_from_payloads / parse_menu_texts 규칙으로 다시 파싱 (모든 코어 사용)"""
+    snaps = list_snapshots(snapshot_dir, latest_only)
+    started = time.time()
     rows = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as ex:
+        for place_rows in ex.map(reparse_snapshot, snaps, chunksize=16):
+            rows.extend(place_rows)
+    print(f"🗂️ 스냅샷 {len(snaps)}개 재파싱 완료 ({time.time() - started:.1f}초)")
+    return pd.DataFrame(rows, columns=["place_id", "menu", "price", "price_num", "currency", "note", "crawled_at"])
 
-    try:
-        for pid in place_ids:
+
+# ========= 전체 크롤링 =========
+# ========= 네트워크 응답(JSON)에서 메뉴 추출 =========
+# 페이지가 받아오는 메뉴 JSON(GraphQL 응답, __APOLLO_STATE__)을 성능 로그로 가로채 바로 디코딩
+# → 화면 텍스트에서 이름/가격 줄을 추측하지 않음. 메뉴를 못 찾으면 기존 DOM 파싱으로 대체
+MENU_SOURCE = "network"  # "network" | "dom"
+NETWORK_WAIT = 3         # 메뉴 응답 대기 상한(초)
+
+
+def format_price(price) -> Optional[str]:
+    """JSON 가격 값(12000, "12,000", "", "변동")을 DOM 파싱 결과와 같은 '12,000원' 형태로"""
+    if price is None or str(price).strip() == "":
+        return None
+    text = str(price).strip()
+    if re.fullmatch(r"\d[\d,]*", text):
+        return f"{int(text.replace(',', '')):,}원"
+    return text
+
+
+def walk_menu_json(obj, in_menu: bool = False, out: Optional[list] = None) -> List[Tuple[str, Optional[str]]]:
+    """JSON 트리에서 메뉴 객체(__typename 또는 상위 키에 'menu' 포함, name+price 보유) 수집"""
+    out = [] if out is None else out
+    if isinstance(obj, dict):
+        here = in_menu or "menu" in str(obj.get("__typename", "")).lower()
+        if here and isinstance(obj.get("name"), str) and "price" in obj and obj["name"].strip():
+            out.append((clean_text(obj["name"]), format_price(obj["price"])))
+        for key, value in obj.items():
+            walk_menu_json(value, here or "menu" in key.lower(), out)
+    elif isinstance(obj, list):
+        for value in obj:
+            walk_menu_json(value, in_menu, out)
+    return out
+
+
+def menus_from_payloads(payloads: list) -> List[Tuple[str, Optional[str]]]:
+    """캡처(또는 저장)된 응답 목록 → [(menu_name, price_text or None), ...]"""
+    pairs = []
+    for payload in payloads:
+        if isinstance(payload, (str, bytes)):
             try:
-                meta = open_place_and_go_menu(driver, wait, pid)
-
-                if not meta["loaded"]:
-                    rows.append({
-                        "place_id": pid, "menu": None, "price": None,
-                        "price_num": None, "currency": "KRW",
-                        "note": "페이지 로딩 실패"
-                    })
+                payload = json.loads(payload)
+            except ValueError:
+                continue
+        walk_menu_json(payload, out=pairs)
+    return list(dict.fromkeys(pairs))
+
+
+def capture_menu_payloads(driver: webdriver.Chrome, timeout: float = NETWORK_WAIT) -> Tuple[list, List[Tuple[str, Optional[str]]]]:
+    """성능 로그의 JSON 응답 본문 + __APOLLO_STATE__ 수집, 메뉴가 디코딩되거나 timeout까지 대기"""
+    pending, payloads = set(), []
+    state = driver.execute_script("return window.__APOLLO_STATE__ || null")
+    if state:
+        payloads.append(state)
+    deadline = time.time() + timeout
+    while True:
+        for entry in driver.get_log("performance"):
+            msg = json.loads(entry["message"])["message"]
+            method, params = msg.get("method"), msg.get("params", {})
+            if method == "Network.responseReceived" and "json" in params["response"].get("mimeType", ""):
+                pending.add(params["requestId"])
+            elif method == "Network.loadingFinished" and params.get("requestId") in pending:
+                try:
+                    res = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+                except WebDriverException:
                     continue
+                body = base64.b64decode(res["body"]).decode("utf-8", "replace") if res.get("base64Encoded") else res["body"]
+                try:
+                    payloads.append(json.loads(body))
+                except ValueError:
+                    pass
+        items = menus_from_payloads(payloads)
+        if items or time.time() >= deadline:
+            return payloads, items
+        time.sleep(0.2)
+
+
+# 실패 유형 코드: 일시적인 코드만 재시도 큐로 보내고, 영구 코드는 다음 실행에서도 건너뜀
+TRANSIENT_CODES = {"timeout", "blocked", "error"}
+PERMANENT_CODES = {"ok", "not_found", "image_only", "parse_failed"}
+BLOCKED_MARKERS = ("captcha", "자동입력 방지", "비정상적인 접근", "일시적으로 제한", "too many requests", "access denied")
+NOT_FOUND_MARKERS = ("존재하지 않는", "페이지를 찾을 수 없", "삭제된 장소", "정보를 찾을 수 없")
+
+
+def classify_page(driver: webdriver.Chrome) -> Optional[str]:
+    """차단/캡차 화면이면 "blocked", 없는 place 안내 화면이면 "not_found", 그 외 None"""
+    try:
+        url = driver.current_url.lower()
+        text = driver.execute_script("return document.body ? document.body.innerText.slice(0, 3000) : ''").lower()
+    except WebDriverException:
+        return None
+    if "captcha" in url or any(m in text for m in BLOCKED_MARKERS):
+        return "blocked"
+    if any(m in text for m in NOT_FOUND_MARKERS):
+        return "not_found"
+    return None
 
-                if meta["image_menu_only"]:
-                    rows.append({
-                        "place_id": pid, "menu": None, "price": None,
-                        "price_num": None, "currency": "KRW",
-                        "note": "메뉴판 이미지 전용"
-                    })
-                    continue
 
-                items = parse_menu_items(driver)
+def fail_row(pid: str, code: str, detail: str) -> Dict:
+    return {"place_id": pid, "menu": None, "price": None, "price_num": None,
+            "currency": "KRW", "note": f"[{code}] {detail}"}
 
-                if not items:
-                    rows.append({
-                        "place_id": pid, "menu": None, "price": None,
-                        "price_num": None, "currency": "KRW",
-                        "note": "텍스트 메뉴 없음"
-                    })
-                    continue
 
-                for name, price in items:
-                    rows.append({
-                        "place_id": pid,
-                        "menu": name,
-                        "price": price,
-                        "price_num": extract_price_num(price) if price else None,
-                        "currency": "KRW",
-                        "note": None
-                    })
-
-            except Exception as e:
-                rows.append({
-                    "place_id": pid, "menu": None, "price": None,
-                    "price_num": None, "currency": "KRW",
-                    "note": f"ERROR: {e}"
-                })
+def crawl_place_menu(driver: webdriver.Chrome, wait: WebDriverWait, pid: str, snapshot_dir: Optional[str],
+                     source: str, path_stats: list, source_counts: Dict[str, int]) -> Tuple[List[Dict], str]:
+    """place 1곳의 (메뉴 행 목록, 결과 코드). 실패 시 note에 "[코드] 사유"를 담은 1행"""
+    rows = []
+    try:
+        if source == "network":
+            driver.get_log("performance")  # 이전 place의 로그 비우기
+        meta = open_place_and_go_menu(driver, wait, pid)
+        stamp = time.strftime("%Y%m%dT%H%M%S")  # 이번 방문의 스냅샷 이름 (JSON/HTML 공통)
+        path_stats.append((meta["path"], meta["elapsed_s"]))
+
+        if not meta["loaded"]:
+            code = classify_page(driver) or ("timeout" if "Timeout" in (meta["error"] or "") else "error")
+            rows.append(fail_row(pid, code, "페이지 로딩 실패"))
+            return rows, code
+
+        items = []
+        if source == "network":
+            payloads, items = capture_menu_payloads(driver, NETWORK_WAIT if meta["menu_text_available"] else 0)
+            if snapshot_dir and payloads:
+                save_snapshot(pid, json.dumps(payloads, ensure_ascii=False), snapshot_dir, ".json.gz", stamp)
+            if items:
+                source_counts["network"] += 1
+
+        if not items and meta["image_menu_only"]:
+            rows.append(fail_row(pid, "image_only", "메뉴판 이미지 전용"))
+            return rows, "image_only"
+
+        if not items:
+            if snapshot_dir:
+                save_snapshot(pid, driver.page_source, snapshot_dir, stamp=stamp)
+            items = parse_menu_items(driver)
+            source_counts["dom"] += 1
+
+        if not items:
+            code = classify_page(driver) or "parse_failed"
+            rows.append(fail_row(pid, code, "텍스트 메뉴 없음"))
+            return rows, code
+
+        for name, price in items:
+            rows.append({
+                "place_id": pid,
+                "menu": name,
+                "price": price,
+                "price_num": extract_price_num(price) if price else None,
+                "currency": "KRW",
+                "note": None
+            })
+
+    except TimeoutException as e:
+        return [fail_row(pid, "timeout", f"ERROR: {e}")], "timeout"
+    except Exception as e:
+        return [fail_row(pid, "error", f"ERROR: {e}")], "error"
+    return rows, "ok"
+
+
+# 멀티프로세스 크롤링: 워커마다 자체 드라이버, N페이지 또는 메모리(RSS) 초과 시 브라우저 재시작
+MENU_WORKERS = 1        # 1이면 현재 프로세스에서 순차 실행
+RECYCLE_PAGES = 200     # 드라이버 1개로 처리할 최대 place 수
+RECYCLE_RSS_MB = 1500   # chromedriver + Chrome 프로세스 RSS 합계 상한(MB, psutil 필요)
 
-            human_sleep(0.8, 1.6)
 
+def browser_rss_mb(driver: webdriver.Chrome) -> float:
+    if psutil is None:
+        return 0.0
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        return sum(p.memory_info().rss for p in [root, *root.children(recursive=True)]) / 2**20
+    except psutil.Error:
+        return 0.0
+
+
+def driver_alive(driver: webdriver.Chrome) -> bool:
+    try:
+        driver.current_url
+        return True
+    except WebDriverException:
+        return False
+
+
+def quit_driver(driver: webdriver.Chrome) -> None:
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+# 스트리밍 저장: place 단위로 SQLite에 바로 커밋 → 중단되어도 처리분 보존, 재실행 시 이어서 진행
+MENU_DB = "naver_menu.sqlite"  # None이면 저장 없이 메모리에만 모음
+MENU_RESUME = True             # True면 MENU_DB에 이미 기록된 place_id는 건너뜀
+MENU_COLUMNS = ["place_id", "menu", "price", "price_num", "currency", "note"]
+
+# 재시도 큐: 일시적 실패(timeout/blocked/error)는 백오프 후 다시 시도, 최대 횟수 초과 시 실패로 기록
+MENU_MAX_ATTEMPTS = 3
+MENU_RETRY_BASE = 10    # 첫 재시도 대기(초), 시도마다 2배
+MENU_RETRY_MAX = 300
+
+
+def retry_delay(attempt: int) -> float:
+    """지수 백오프 + jitter (attempt: 지금까지 시도한 횟수)"""
+    delay = min(MENU_RETRY_MAX, MENU_RETRY_BASE * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class MenuSink:
+    """메뉴 행 + 처리 완료 place 기록 (WAL 모드라 여러 워커 프로세스가 동시에 기록 가능)"""
+    def __init__(self, path: str = MENU_DB):
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS menus ("
+            "place_id TEXT, menu TEXT, price TEXT, price_num INTEGER, currency TEXT, note TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS menus_place_id ON menus (place_id)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS places ("
+            "place_id TEXT PRIMARY KEY, n_rows INTEGER, crawled_at REAL, status TEXT, attempts INTEGER)"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(places)")}
+        for column, kind in (("status", "TEXT"), ("attempts", "INTEGER")):  # 이전 형식 DB 보완
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE places ADD COLUMN {column} {kind}")
+
+    def write(self, place_id: str, rows: List[Dict], status: str = "ok", attempts: int = 1) -> None:
+        """place 1곳의 행과 결과 코드를 한 트랜잭션으로 교체 기록"""
+        with self.conn:
+            self.conn.execute("DELETE FROM menus WHERE place_id = ?", (place_id,))
+            self.conn.executemany(
+                "INSERT INTO menus VALUES (?, ?, ?, ?, ?, ?)",
+                [tuple(r[c] for c in MENU_COLUMNS) for r in rows]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO places (place_id, n_rows, crawled_at, status, attempts) "
+                "VALUES (?, ?, ?, ?, ?)", (place_id, len(rows), time.time(), status, attempts)
+            )
+
+    def done_ids(self) -> set:
+        """다시 크롤링할 필요 없는 place (영구 코드, 또는 코드 기록 전 형식의 행)"""
+        marks = ", ".join("?" * len(PERMANENT_CODES))
+        query = f"SELECT place_id FROM places WHERE status IS NULL OR status IN ({marks})"
+        return {pid for (pid,) in self.conn.execute(query, sorted(PERMANENT_CODES))}
+
+    def read(self, place_ids: List[str]) -> pd.DataFrame:
+        """입력 place_id 순서대로 저장된 행 조회"""
+        df = pd.read_sql_query(f"SELECT {', '.join(MENU_COLUMNS)} FROM menus ORDER BY rowid", self.conn)
+        order = {pid: i for i, pid in enumerate(dict.fromkeys(place_ids))}
+        df = df[df["place_id"].isin(order)]
+        df = df.iloc[df["place_id"].map(order).argsort(kind="stable")].reset_index(drop=True)
+        df["price_num"] = df["price_num"].astype("Int64")
+        return df
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def crawl_shard(place_ids: List[str], headless: bool, lean: bool, snapshot_dir: Optional[str],
+                source: str, worker_idx: int = 0, sink_path: Optional[str] = None, pace_shared=None
+                ) -> Tuple[List[Tuple[str, List[Dict]]], list, Dict[str, int], Dict[str, int]]:
+    """워커 1개 분량 처리 → ([(place_id, 행 목록), ...], 진입 경로 통계, 추출 방식 집계, 결과 코드 집계)
+    sink_path가 있으면 행은 place마다 바로 기록하고 메모리에는 남기지 않음
+    pace_shared=(Manager dict, Manager Lock)이면 요청 간격을 다른 워커와 공유"""
+    global pacer
+    if pace_shared is not None:
+        pacer = PoliteScheduler(*pace_shared)
+
+    def start():
+        return build_driver(headless=headless, lean=lean, perf_log=(source == "network"),
+                            cache_dir=os.path.join(LEAN_CACHE_DIR, f"w{worker_idx}"))
+
+    if psutil is None and worker_idx == 0:  # 워커마다 같은 경고가 반복되지 않도록 첫 워커만 출력
+        print(f"⚠️ psutil 미설치 → 메모리(RSS) 기준 재시작 없이 "
+              f"{RECYCLE_PAGES}페이지마다만 브라우저 재시작 (pip install psutil)")
+    sink = MenuSink(sink_path) if sink_path else None
+    driver, wait = start()
+    results, path_stats, source_counts = [], [], {"network": 0, "dom": 0}
+    code_counts = {}  # 최종 결과 코드별 place 수 + 재시도 횟수("retry")
+    queue = [(0.0, i, pid, 1) for i, pid in enumerate(place_ids)]  # (재시도 가능 시각, 순번, place_id, 시도 차수)
+    pages = 0
+    try:
+        while queue:
+            ready_at, order, pid, attempt = heapq.heappop(queue)
+            time.sleep(max(0.0, ready_at - time.time()))
+            waited, started = pacer.waited, time.time()
+            rows, code = crawl_place_menu(driver, wait, pid, snapshot_dir, source, path_stats, source_counts)
+            load_s = time.time() - started - (pacer.waited - waited)  # 예산·차단 정지 대기는 응답 시간이 아님
+            pacer.report(PLACE_HOST, pace_outcome(code, load_s))
+            if code in TRANSIENT_CODES and attempt < MENU_MAX_ATTEMPTS:
+                delay = retry_delay(attempt)
+                print(f"🔁 [워커 {worker_idx}] {pid} {code} → {delay:.0f}초 후 재시도 ({attempt + 1}/{MENU_MAX_ATTEMPTS})")
+                heapq.heappush(queue, (time.time() + delay, order, pid, attempt + 1))
+                code_counts["retry"] = code_counts.get("retry", 0) + 1
+            else:
+                code_counts[code] = code_counts.get(code, 0) + 1
+                if sink:
+                    sink.write(pid, rows, code, attempt)
+                    rows = []
+                results.append((order, pid, rows))
+            pages += 1
+            rss = browser_rss_mb(driver)
+            last = not queue
+            if not last and (pages >= RECYCLE_PAGES or rss > RECYCLE_RSS_MB or not driver_alive(driver)):
+                print(f"♻️ [워커 {worker_idx}] 브라우저 재시작 ({pages}페이지, {rss:.0f}MB)")
+                quit_driver(driver)
+                driver, wait = start()
+                pages = 0
+    finally:
+        quit_driver(driver)
+        if sink:
+            sink.close()
+    results = [(pid, rows) for _, pid, rows in sorted(results, key=lambda r: r[0])]  # 재시도로 바뀐 순서 복원
+    return results, path_stats, source_counts, code_counts
+
+
+def crawl_naver_menu(place_ids: List[str], headless: bool = True, lean: bool = LEAN_PROFILE,
+                     snapshot_dir: Optional[str] = SNAPSHOT_DIR, source: str = MENU_SOURCE,
+                     workers: int = MENU_WORKERS, sink_path: Optional[str] = MENU_DB,
+                     resume: bool = MENU_RESUME, return_df: bool = True) -> Optional[pd.DataFrame]:
+    """place_id 목록의 메뉴 수집. sink_path가 있으면 place마다 바로 저장하고,
+    return_df=False면 DataFrame을 만들지 않음 (긴 실행에서 메모리 절약)"""
+    all_ids = place_ids
+    if sink_path:
+        sink = MenuSink(sink_path)
+        done = sink.done_ids() if resume else set()
+        sink.close()
+        unique_ids = list(dict.fromkeys(place_ids))
+        place_ids = [pid for pid in unique_ids if pid not in done]
+        print(f"♻️ 이미 기록된 place {len(unique_ids) - len(place_ids)}곳 건너뜀, 크롤링 대상 {len(place_ids)}곳")
+
+    # 연속 구간으로 나눠 워커에 배정 → 결과를 워커 순서대로 이으면 입력 순서 유지
+    workers = max(1, min(workers, len(place_ids)))
+    size = max(1, -(-len(place_ids) // workers))
+    shards = [place_ids[i:i + size] for i in range(0, len(place_ids), size)]
+    args = [(shard, headless, lean, snapshot_dir, source, i, sink_path) for i, shard in enumerate(shards)]
+    global pacer
+    if len(shards) > 1:
+        # 요청 간격·예산 상태를 모든 워커가 공유 (호스트 기준이므로 워커 수와 무관하게 예산 유지)
+        with mp.Manager() as manager, ProcessPoolExecutor(max_workers=len(shards)) as ex:
+            pacer = PoliteScheduler(manager.dict(), manager.Lock())
+            shared = [(pacer.state, pacer.lock)] * len(args)
+            outputs = list(ex.map(crawl_shard, *zip(*args), shared))
+            pace_metrics = pacer.metrics()
+        pacer = PoliteScheduler()
+    else:
+        outputs = [crawl_shard(*a) for a in args]
+        pace_metrics = pacer.metrics()
+
+    rows, path_stats, source_counts, code_counts = [], [], {"network": 0, "dom": 0}, {}
+    for results, stats, counts, codes in outputs:
+        for _, place_rows in results:
+            rows.extend(place_rows)
+        path_stats.extend(stats)
+        for key, n in counts.items():
+            source_counts[key] += n
+        for key, n in codes.items():
+            code_counts[key] = code_counts.get(key, 0) + n
+
+    report_menu_paths(path_stats)
+    print(f"📊 메뉴 추출 방식: {source_counts}")
+    print(f"📊 결과 코드: {dict(sorted(code_counts.items()))}")
+    report_pace(pace_metrics)
+    if not return_df:
+        return None
+    if sink_path:
+        sink = MenuSink(sink_path)
+        df = sink.read(all_ids)
+        sink.close()
+        return df
+    df = pd.DataFrame(rows, columns=MENU_COLUMNS)
+    return df
+
+
+def report_menu_paths(path_stats: List[Tuple[str, float]]) -> None:
+    """메뉴 진입 경로별 사용 횟수와 평균 소요 시간 (direct=라우트 직행, tab/scroll/home=홈 경유)"""
+    if not path_stats:
+        return
+    stats = pd.DataFrame(path_stats, columns=["path", "elapsed_s"])
+    summary = stats.groupby("path")["elapsed_s"].agg(count="count", mean_s="mean")
+    print("📊 메뉴 진입 경로")
+    print(summary.round(2).to_string())
+
+
+# ========= 벤치마크: 경량 프로필 / 메뉴 파싱 방식 비교 =========
+def page_transfer_bytes(driver: webdriver.Chrome) -> int:
+    """성능 로그(Network.loadingFinished)의 encodedDataLength 합계 = 실제 전송 바이트"""
+    total = 0
+    for entry in driver.get_log("performance"):
+        msg = json.loads(entry["message"])["message"]
+        if msg.get("method") == "Network.loadingFinished":
+            total += int(msg["params"].get("encodedDataLength", 0))
+    return total
+
+
+def benchmark_lean_profile(place_ids: List[str], headless: bool = True) -> pd.DataFrame:
+    """같은 place_id 목록을 일반/경량 프로필로 각각 열어 전송량과 페이지 준비 시간 비교"""
+    rows = []
+    for lean in (False, True):
+        driver, wait = build_driver(headless=headless, lean=lean, perf_log=True)
+        try:
+            for pid in place_ids:
+                driver.get_log("performance")  # 이전 페이지 로그 비우기
+                pacer.acquire(PLACE_HOST)
+                started = time.time()
+                driver.get(f"https://pcmap.place.naver.com/restaurant/{pid}/home")
+                try:
+                    wait.until(EC.presence_of_element_located((By.ID, "app-root")))
+                    ready_s = time.time() - started
+                except Exception:
+                    ready_s = None
+                rows.append({"lean": lean, "place_id": pid, "ready_s": ready_s,
+                             "bytes": page_transfer_bytes(driver)})
+        finally:
+            driver.quit()
+
+    df = pd.DataFrame(rows)
+    summary = df.groupby("lean").agg(ready_s=("ready_s", "median"), kb=("bytes", lambda b: b.mean() / 1024))
+    print("📊 경량 프로필 비교 (페이지당 중앙 준비 시간 / 평균 전송량)")
+    print(summary.round(2).to_string())
+    return df
+
+
+def benchmark_parse(place_ids: List[str], headless: bool = True) -> pd.DataFrame:
+    """place별 메뉴 파싱 시간: 요소별 .text 방식 vs execute_script 1회 방식 (결과 동일 여부 포함)"""
+    driver, wait = build_driver(headless=headless)
+    rows = []
+    try:
+        for pid in place_ids:
+            if not open_place_and_go_menu(driver, wait, pid).get("loaded"):
+                continue
+            t0 = time.perf_counter()
+            old = parse_menu_texts(menu_texts_elementwise(driver))
+            t1 = time.perf_counter()
+            new = parse_menu_items(driver)
+            t2 = time.perf_counter()
+            rows.append({"place_id": pid, "items": len(new), "same": old == new,
+                         "elementwise_ms": (t1 - t0) * 1000, "script_ms": (t2 - t1) * 1000})
     finally:
         driver.quit()
 
     df = pd.DataFrame(rows)
+    print("📊 메뉴 파싱 시간 비교 (place당 ms)")
+    print(df.round(1).to_string(index=False))
+    if len(df):
+        print(f"   평균 {df['elementwise_ms'].mean():.0f}ms → {df['script_ms'].mean():.0f}ms, "
+              f"결과 불일치 {int((~df['same']).sum())}건")
     return df
 
 
+def benchmark_pacer(pages: int = 12, page_s: float = 0.05, budget: int = 2, window_s: float = 1.0) -> Dict[str, Dict]:
+    """브라우저 없이 정상 페이지만 가정해 스케줄러 확인 (crawl_shard와 같은 방식으로 처리 시간 측정)
+    예산 대기가 느린 응답으로 집계되어 간격이 늘어나지 않는지 검증 후 실효 속도 출력"""
+    sched = PoliteScheduler(budget=budget, window_s=window_s)
+    outcomes = []
+    for _ in range(pages):
+        waited, started = sched.waited, time.time()
+        sched.acquire(PLACE_HOST)
+        time.sleep(page_s)  # 정상 페이지 처리
+        load_s = time.time() - started - (sched.waited - waited)
+        outcomes.append(pace_outcome("ok", load_s, slow_s=window_s / 2))
+        sched.report(PLACE_HOST, outcomes[-1])
+    metrics = sched.metrics()
+    assert sched.waited > window_s, "예산 대기가 한 번도 발생하지 않음 (pages/budget 확인)"
+    assert outcomes.count("slow") == 0, f"정상 페이지 {outcomes.count('slow')}건이 느린 응답으로 집계됨"
+    assert metrics[PLACE_HOST]["interval_s"] <= PACE_START, "정상 응답만 있었는데 요청 간격이 늘어남"
+    print(f"📊 스케줄러 확인: 정상 페이지 {pages}건 모두 ok, 예산 대기 {sched.waited:.1f}초")
+    report_pace(metrics, path=None)
+    return metrics
+
+
 # ========= 실행 =========
+RUN_BENCHMARK = False  # True면 크롤링 전에 앞쪽 10개 place_id로 경량 프로필·파싱 방식 비교 + 스케줄러 확인
+REPARSE_ONLY = False   # True면 크롤링 없이 스냅샷 저장소만 현재 파싱 규칙으로 다시 추출
+
 if __name__ == "__main__":
 
-    # CSV 절대경로 (Windows)
-    csv_path = r"C:\All4land_Project\good_restaurant_placeid_temp.csv"
+    snapshot_dir = r"C:\All4land_Project\menu_snapshots"  # 메뉴 HTML 스냅샷 저장소
+
+    if REPARSE_ONLY:
+        output_path = r"C:\All4land_Project\naver_menu_reparsed.csv"
+        reparse_snapshots(snapshot_dir).to_csv(output_path, index=False, encoding="utf-8-sig")
+        print(f"✔ 재파싱 완료 → 저장됨: {output_path}")
+    else:
+        # CSV 절대경로 (Windows)
+        csv_path = r"C:\All4land_Project\good_restaurant_placeid_temp.csv"
+
+        print(f"CSV 읽는 중: {csv_path}")
 
-    print(f"CSV 읽는 중: {csv_path}")
+        # place_id 컬럼 읽기
+        df_in = pd.read_csv(csv_path)
 
-    # place_id 컬럼 읽기
-    df_in = pd.read_csv(csv_path)
+        if "place_id" not in df_in.columns:
+            raise Exception("CSV에 'place_id' 컬럼이 없습니다!")
 
-    if "place_id" not in df_in.columns:
-        raise Exception("CSV에 'place_id' 컬럼이 없습니다!")
+        # place_id 리스트로 변환
+        place_ids = df_in["place_id"].astype(str).dropna().tolist()
 
-    # place_id 리스트로 변환
-    place_ids = df_in["place_id"].astype(str).dropna().tolist()
+        print(f"총 {len(place_ids)}개의 place_id 읽음")
 
-    print(f"총 {len(place_ids)}개의 place_id 읽음")
+        if RUN_BENCHMARK:
+            benchmark_lean_profile(place_ids[:10])
+            benchmark_parse(place_ids[:10])
+            benchmark_pacer()
 
-    # 크롤링 실행
-    result = crawl_naver_menu(place_ids, headless=True)
+        # 크롤링 실행
+        result = crawl_naver_menu(place_ids, headless=True, snapshot_dir=snapshot_dir)
 
-    # 결과 저장 경로 지정
-    output_path = r"C:\All4land_Project\naver_menu_result.csv"
-    result.to_csv(output_path, index=False, encoding="utf-8-sig")
+        # 결과 저장 경로 지정
+        output_path = r"C:\All4land_Project\naver_menu_result.csv"
+        result.to_csv(output_path, index=False, encoding="utf-8-sig")
 
-    print(f"✔ 크롤링 완료 → 저장됨: {output_path}")
+        print(f"✔ 크롤링 완료 → 저장됨: {output_path}")
 